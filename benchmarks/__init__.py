@@ -0,0 +1 @@
+"""Offline benchmarks for AHA Trash Pickup."""
@@ -0,0 +1,257 @@
+"""Offline micro-benchmarks for the AHA Trash Pickup hot paths.
+
+Run from the repository root with Home Assistant installed::
+
+    python -m benchmarks [--pages DIR] [--iterations N] [--filter TEXT] [--json]
+
+No network access is needed, all HTTP responses are served from fixtures.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.aha_trash import AHATrashCoordinator, form_options
+from custom_components.aha_trash.client import AHAClient
+from custom_components.aha_trash.binary_sensor import AHATrashBinarySensor
+from custom_components.aha_trash.calendar import AHATrashAddressCalendar, AHATrashCalendar
+from custom_components.aha_trash.sensor import AHATrashDateSensor
+from custom_components.aha_trash.schedule import build_schedule
+
+from . import fixtures
+
+class FakeResponse:
+    """Minimal aiohttp response serving a fixture body."""
+
+    status = 200
+    charset = "utf-8"
+
+    def __init__(self, body):
+        self._body = body
+
+    async def read(self):
+        return self._body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+class FakeSession:
+    """Client session answering every request through a page function."""
+
+    def __init__(self, page):
+        self._page = page
+
+    def request(self, method, url, data=None, **kwargs):
+        return FakeResponse(self._page(data or {}).encode())
+
+def measure(func, iterations):
+    """Run an async callable, return latencies in ns and peak allocation per call."""
+    loop = asyncio.get_event_loop()
+    for _ in range(min(iterations, 10)):
+        loop.run_until_complete(func())
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        loop.run_until_complete(func())
+        latencies.append(time.perf_counter_ns() - start)
+
+    peaks = []
+    tracemalloc.start()
+    for _ in range(min(iterations, 20)):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        loop.run_until_complete(func())
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return latencies, statistics.median(peaks)
+
+def summarize(name, latencies, peak):
+    """Return throughput, latency percentiles and allocation of a benchmark."""
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "name": name,
+        "iterations": len(latencies),
+        "ops_per_sec": len(latencies) / (sum(latencies) / 1e9),
+        "p50_us": cuts[49] / 1e3,
+        "p95_us": cuts[94] / 1e3,
+        "p99_us": cuts[98] / 1e3,
+        "peak_kib": peak / 1024,
+    }
+
+def schedule_pages(pages_dir):
+    """Return the schedule fixtures, plus recorded pages from pages_dir."""
+    pages = {name: page() for name, page in fixtures.SCHEDULE_PAGES.items()}
+    if pages_dir:
+        for path in sorted(Path(pages_dir).glob("*.html")):
+            pages[path.stem] = path.read_text(encoding="utf-8")
+    return pages
+
+def coordinator_cases(hass, pages):
+    """Return benchmarks of _async_update_data for every schedule page."""
+    cases = {}
+    for name, page in pages.items():
+        entry = SimpleNamespace(entry_id=f"bench_{name}", title=name, data={
+            "gemeinde": "Hannover", "strasse": "12345@Teststraße@Hannover", "hausnr": 1,
+        })
+        # No response cache, every update is parsed from the page
+        client = AHAClient(hass, FakeSession(lambda data, page=page: page), cache_ttl=0)
+        coordinator = AHATrashCoordinator(hass, client, entry)
+
+        async def save_cache(result):
+            """Skip disk writes, only parsing is measured."""
+
+        coordinator._async_save_cache = save_cache
+
+        async def parse(coordinator=coordinator):
+            coordinator._fingerprint = None
+            await coordinator._async_update_data()
+
+        async def unchanged(coordinator=coordinator):
+            coordinator.data = await coordinator._async_update_data()
+
+        cases[f"update_parse/{name}"] = parse
+        cases[f"update_unchanged/{name}"] = unchanged
+    return cases
+
+def calendar_cases(hass):
+    """Return benchmarks of async_get_events over several windows."""
+    start = date.today()
+    dates = {
+        abfallart: fixtures.pickup_dates(start - timedelta(days=5 * 365), 10 * 365, abfallart)
+        for abfallart in fixtures.ABFALLARTEN
+    }
+    entry = SimpleNamespace(entry_id="bench_calendar", title="Kalender", data={})
+    # No history file, passed dates come from the schedule itself
+    coordinator = AHATrashCoordinator(hass, None, entry)
+    coordinator.data = build_schedule(dates, start)
+    calendar = AHATrashCalendar(coordinator, "Bioabfall")
+    combined = AHATrashAddressCalendar(coordinator)
+    now = dt_util.start_of_local_day(start)
+    cases = {}
+    for label, days in (("week", 7), ("year", 365), ("decade", 3650)):
+        first = now - timedelta(days=days // 2)
+        last = first + timedelta(days=days)
+
+        async def get_events(first=first, last=last):
+            await calendar.async_get_events(hass, first, last)
+
+        async def get_combined(first=first, last=last):
+            await combined.async_get_events(hass, first, last)
+
+        cases[f"calendar_events/{label}"] = get_events
+        cases[f"calendar_combined/{label}"] = get_combined
+    return cases
+
+def entity_cases(hass):
+    """Return benchmarks of the properties read on state writes of the per type entities."""
+    start = date.today()
+    dates = {
+        abfallart: fixtures.pickup_dates(start, 365, abfallart)
+        for abfallart in fixtures.ABFALLARTEN
+    }
+    entry = SimpleNamespace(entry_id="bench_entities", title="Entitäten", data={})
+    coordinator = AHATrashCoordinator(hass, None, entry)
+    coordinator.data = build_schedule(dates, start)
+    entities = [
+        entity_class(coordinator, abfallart)
+        for entity_class in (AHATrashBinarySensor, AHATrashDateSensor, AHATrashCalendar)
+        for abfallart in fixtures.ABFALLARTEN
+    ]
+
+    async def write_states():
+        for entity in entities:
+            entity.available, entity.state, entity.icon, entity.extra_state_attributes, entity.device_info
+
+    async def update_and_write():
+        # The snapshots are derived again after every coordinator update
+        coordinator.async_update_listeners()
+        await write_states()
+
+    return {"entity_states/cached": write_states, "entity_states/updated": update_and_write}
+
+def flow_cases(hass):
+    """Return benchmarks of the form option fetchers."""
+    def page(data):
+        if "von" in data:
+            return fixtures.strasse_page(data["gemeinde"], data["von"])
+        if "hausnr" in data:
+            return fixtures.ladeort_page()
+        return fixtures.gemeinde_page()
+
+    cache = {}
+
+    def cached_page(data):
+        key = tuple(sorted(data.items()))
+        if key not in cache:
+            cache[key] = page(data)
+        return cache[key]
+
+    client = AHAClient(hass, FakeSession(cached_page), cache_ttl=0)
+
+    async def with_session(coro_func):
+        with mock.patch.object(form_options, "async_get_client", return_value=client):
+            await coro_func()
+
+    return {
+        "flow_options/gemeinde": lambda: with_session(
+            lambda: form_options.fetch_form_options_gemeinde(hass)),
+        "flow_options/strasse": lambda: with_session(
+            lambda: form_options.fetch_form_options_strasse(hass, "Hannover")),
+        "flow_options/ladeort": lambda: with_session(
+            lambda: form_options.fetch_form_options_ladeort(hass, "Hannover", "12345@Teststraße@Hannover", 1, "")),
+    }
+
+def main():
+    """Run the benchmarks and print a report."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", help="directory with recorded schedule pages (*.html)")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--filter", default="", help="only run benchmarks containing this text")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    async def create_hass():
+        return HomeAssistant(tempfile.mkdtemp(prefix="aha_bench_"))
+
+    hass = loop.run_until_complete(create_hass())
+    cases = {}
+    cases.update(coordinator_cases(hass, schedule_pages(args.pages)))
+    cases.update(calendar_cases(hass))
+    cases.update(entity_cases(hass))
+    cases.update(flow_cases(hass))
+
+    results = []
+    for name, func in cases.items():
+        if args.filter in name:
+            results.append(summarize(name, *measure(func, args.iterations)))
+
+    if args.json:
+        json.dump({"created": datetime.now().isoformat(), "results": results}, sys.stdout, indent=2)
+        print()
+        return
+    print(f"{'benchmark':40} {'ops/s':>10} {'p50 µs':>10} {'p95 µs':>10} {'p99 µs':>10} {'peak KiB':>10}")
+    for result in results:
+        print(
+            f"{result['name']:40} {result['ops_per_sec']:10.1f} {result['p50_us']:10.1f} "
+            f"{result['p95_us']:10.1f} {result['p99_us']:10.1f} {result['peak_kib']:10.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
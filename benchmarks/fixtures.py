@@ -0,0 +1,98 @@
+"""AHA page fixtures for benchmarks and load tests.
+
+The pages mirror the markup the integration parses: the municipality form,
+the street list per initial letter, the ladeort selection and the pickup
+schedule with one block per waste type. Recorded pages can be used instead
+by passing a directory of ``*.html`` files to the benchmark runner.
+"""
+import random
+from datetime import date, timedelta
+
+ABFALLARTEN = ["Restabfall", "Bioabfall", "Papier", "Leichtverpackungen"]
+WOCHENTAGE = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]
+
+GEMEINDEN = [
+    "Barsinghausen", "Burgdorf", "Burgwedel", "Garbsen", "Gehrden", "Hannover",
+    "Hemmingen", "Isernhagen", "Laatzen", "Langenhagen", "Lehrte", "Neustadt a. Rbge.",
+    "Pattensen", "Ronnenberg", "Seelze", "Sehnde", "Springe", "Uetze", "Wedemark",
+    "Wennigsen (Deister)", "Wunstorf",
+]
+
+# Pickup interval in days per waste type
+INTERVALLE = {"Restabfall": 14, "Bioabfall": 7, "Papier": 28, "Leichtverpackungen": 14}
+
+HEADER = (
+    '<!DOCTYPE html><html lang="de"><head><meta charset="utf-8"><title>Abfuhrkalender - aha</title>'
+    + "".join(f'<link rel="stylesheet" href="/assets/css/style{i}.css">' for i in range(12))
+    + "</head><body><header><nav><ul>"
+    + "".join(f'<li><a href="/seite{i}/">Navigation {i}</a></li>' for i in range(80))
+    + "</ul></nav></header><main>"
+)
+FOOTER = (
+    "</main><footer>"
+    + "".join(f'<p>Hinweis {i}: Bitte stellen Sie die Behälter bis 6 Uhr bereit.</p>' for i in range(40))
+    + "</footer></body></html>"
+)
+
+def _select(name, options, selected=None):
+    """Return a select element with the given value to label options."""
+    out = [f'<select id="{name}" name="{name}" class="form-control">']
+    for value, label in options.items():
+        if value == selected:
+            out.append(f'<option value="{value}" selected="selected">{label}</option>')
+        else:
+            out.append(f'<option value="{value}">{label}</option>')
+    out.append("</select>")
+    return "".join(out)
+
+def gemeinde_page():
+    """Return the initial form page with the municipality selection."""
+    options = {"": "Bitte wählen"} | {gemeinde: gemeinde for gemeinde in GEMEINDEN}
+    return HEADER + "<form>" + _select("gemeinde", options, "Hannover") + "</form>" + FOOTER
+
+def strassen(gemeinde, letter, count):
+    """Return count street options of a municipality for one initial letter."""
+    rng = random.Random(f"{gemeinde}{letter}")
+    return {
+        f"{rng.randrange(10000, 99999)}@{letter}{name}straße@{gemeinde}": f"{letter}{name}straße"
+        for name in sorted(f"{chr(rng.randrange(97, 123))}{i:03d}" for i in range(count))
+    }
+
+def strasse_page(gemeinde, letter, count=40):
+    """Return the form page with the streets of one initial letter."""
+    options = strassen(gemeinde, letter, count)
+    return HEADER + "<form>" + _select("strasse", options) + "</form>" + FOOTER
+
+def ladeort_page(count=3):
+    """Return the page asking to choose a ladeort for the address."""
+    options = {f"{i:05d}": f"Ladeort {i}, Sammelplatz Hof {i}" for i in range(1, count + 1)}
+    return HEADER + "<form>" + _select("ladeort", options) + "</form>" + FOOTER
+
+def pickup_dates(start, days, abfallart):
+    """Return the pickup dates of a waste type within days after start."""
+    interval = INTERVALLE[abfallart]
+    first = start + timedelta(days=ABFALLARTEN.index(abfallart) + 1)
+    return [first + timedelta(days=n) for n in range(0, days, interval)]
+
+def schedule_page(start=None, days=365, abfallarten=ABFALLARTEN):
+    """Return a schedule page covering days after start."""
+    start = start or date.today()
+    out = [HEADER, '<form>', _select("gemeinde", {"Hannover": "Hannover"}, "Hannover"), '</form>']
+    out.append('<table class="abfuhrkalender">')
+    for abfallart in abfallarten:
+        out.append(f'<tr><th colspan="3"><strong>{abfallart}</strong> <span>Abholtermine</span></th></tr>')
+        for termin in pickup_dates(start, days, abfallart):
+            out.append(
+                f'<tr><td>{WOCHENTAGE[termin.weekday()]}, {termin:%d.%m.%Y}</td>'
+                f'<td>{abfallart}</td><td><a href="/ical/{termin:%Y%m%d}">Export</a></td></tr>'
+            )
+    out.append('<tr><td colspan="3">Alle Angaben ohne Gewähr.</td></tr></table>')
+    out.append(FOOTER)
+    return "".join(out)
+
+# Schedule pages of different sizes used by the benchmarks
+SCHEDULE_PAGES = {
+    "small_town": lambda: schedule_page(days=120, abfallarten=["Restabfall", "Papier", "Leichtverpackungen"]),
+    "hannover_street": lambda: schedule_page(days=365),
+    "multi_year": lambda: schedule_page(days=3 * 365),
+}
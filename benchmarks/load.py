@@ -0,0 +1,255 @@
+"""Load test of the AHA Trash Pickup integration against a local AHA stub.
+
+Run from the repository root with Home Assistant installed::
+
+    python -m benchmarks.load [--entries 10,100,500] [--latency MS] [--error-rate RATE] [--json]
+
+Every entry count runs in a fresh process: a stub of the AHA site is started
+in a child process, N config entries with their entities are set up in a real
+Home Assistant instance, then all coordinators are refreshed at once like at
+07:00, parsing every page like after a day change. Reported are wall times,
+parse time, event loop lag, peak RSS and request rate.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from aiohttp import web
+
+from . import fixtures
+
+REPO = Path(__file__).resolve().parent.parent
+
+def free_port():
+    """Return a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def create_stub(latency, error_rate, seed=0):
+    """Return an aiohttp app answering like the AHA form, with latency in seconds."""
+    rng = random.Random(seed)
+    schedule = fixtures.schedule_page(days=365)
+    gemeinde = fixtures.gemeinde_page()
+    ladeort = fixtures.ladeort_page()
+    counts = {"requests": 0, "errors": 0}
+
+    async def form(request):
+        counts["requests"] += 1
+        data = await request.post()
+        if latency:
+            await asyncio.sleep(rng.uniform(0.5, 1.5) * latency)
+        if rng.random() < error_rate:
+            counts["errors"] += 1
+            return web.Response(status=500)
+        if request.method == "GET" or not data.get("gemeinde"):
+            text = gemeinde
+        elif "von" in data:
+            text = fixtures.strasse_page(data["gemeinde"], data["von"])
+        elif data.get("hausnr", "").endswith("99") and data.get("ladeort") in (None, "", "None"):
+            # Addresses with several ladeorte
+            text = ladeort
+        else:
+            text = schedule
+        return web.Response(text=text, content_type="text/html")
+
+    async def stats(request):
+        return web.json_response(counts)
+
+    app = web.Application()
+    app.router.add_get("/stats", stats)
+    app.router.add_route("*", "/", form)
+    return app
+
+def serve_stub(port, latency, error_rate, ready):
+    """Serve the stub until the process is terminated."""
+
+    async def serve():
+        runner = web.AppRunner(create_stub(latency, error_rate))
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes up a sleeping task."""
+
+    def __init__(self, interval=0.01):
+        """Initialize monitor."""
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    def start(self):
+        """Start sampling."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(loop.time() - start - self.interval, 0.0))
+
+    def stop(self):
+        """Stop sampling and return max and p99 lag in milliseconds."""
+        self._task.cancel()
+        lags = sorted(self.lags) or [0.0]
+        return {
+            "loop_lag_max_ms": round(lags[-1] * 1e3, 1),
+            "loop_lag_p99_ms": round(lags[min(int(len(lags) * 0.99), len(lags) - 1)] * 1e3, 1),
+        }
+
+async def create_hass(config_dir):
+    """Return a Home Assistant instance with the base functionality and http loaded."""
+    from homeassistant import auth, bootstrap, config_entries, loader
+    from homeassistant.core import HomeAssistant
+    from homeassistant.setup import async_setup_component
+
+    hass = HomeAssistant(config_dir)
+    hass.config.set_time_zone("Europe/Berlin")
+    loader.async_setup(hass)
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await bootstrap.async_load_base_functionality(hass)
+    await hass.config_entries.async_initialize()
+    hass.auth = await auth.auth_manager_from_config(hass, [{"type": "homeassistant"}], [])
+    await async_setup_component(hass, "http", {"http": {"server_port": free_port()}})
+    return hass
+
+async def run_load(args, base_url):
+    """Set up args.entries entries against the stub, return the measurements."""
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.setup import async_setup_component
+
+    from custom_components.aha_trash.const import DATA_CLIENT, DATA_SCHEDULER, DOMAIN
+
+    config_dir = tempfile.mkdtemp(prefix="aha_load_")
+    (Path(config_dir) / "custom_components").symlink_to(REPO / "custom_components")
+    hass = await create_hass(config_dir)
+    monitor = LoopLagMonitor()
+    try:
+        with mock.patch("custom_components.aha_trash.client.BASE_URL", base_url):
+            await async_setup_component(hass, DOMAIN, {DOMAIN: {
+                "concurrency": args.concurrency, "rate_limit": args.rate_limit,
+            }})
+            # Every address is distinct, but repeated refreshes must reach the stub
+            hass.data[DATA_CLIENT].cache_ttl = 0
+            entries = [
+                ConfigEntry(
+                    version=1, minor_version=1, domain=DOMAIN, title=f"Teststraße {n}", source="user",
+                    data={"gemeinde": "Hannover", "strasse": "12345@Teststraße@Hannover", "hausnr": n,
+                          "hausnraddon": "", "ladeort": None},
+                )
+                for n in range(1, args.entries + 1)
+            ]
+            monitor.start()
+            start = time.perf_counter()
+            await asyncio.gather(*(hass.config_entries.async_add(entry) for entry in entries))
+            await hass.async_block_till_done()
+            setup = time.perf_counter() - start
+
+            scheduler = hass.data[DATA_SCHEDULER]
+            coordinators = list(hass.data[DOMAIN].values())
+            # At 07:00 the day has changed, so no coordinator may skip parsing the unchanged page
+            for coordinator in coordinators:
+                coordinator._fingerprint = None
+            requests_before = await stub_requests(hass, base_url)
+            start = time.perf_counter()
+            await asyncio.gather(*(scheduler.async_run(c.async_refresh) for c in coordinators))
+            await hass.async_block_till_done()
+            storm = time.perf_counter() - start
+            requests = await stub_requests(hass, base_url) - requests_before
+            result = {
+                "entries": args.entries,
+                "loaded": len(coordinators),
+                "entities": len(hass.states.async_all()),
+                "setup_s": round(setup, 3),
+                "refresh_s": round(storm, 3),
+                "requests": requests,
+                "requests_per_s": round(requests / storm, 1) if storm else None,
+                "parse_s": round(sum(c.stats.last.parse for c in coordinators if c.stats.last), 3),
+                "failed": sum(1 for c in coordinators if not c.last_update_success),
+            }
+            result |= monitor.stop()
+    finally:
+        await hass.async_stop(force=True)
+        shutil.rmtree(config_dir, ignore_errors=True)
+    # ru_maxrss is in KiB on Linux
+    result["rss_peak_mib"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return result
+
+async def stub_requests(hass, base_url):
+    """Return the number of requests the stub has answered."""
+    from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+    async with async_get_clientsession(hass).get(f"{base_url}stats") as resp:
+        return (await resp.json())["requests"]
+
+def run_single(args):
+    """Run one entry count with its own stub process, return the measurements."""
+    port = free_port()
+    ready = multiprocessing.Event()
+    stub = multiprocessing.Process(
+        target=serve_stub, args=(port, args.latency / 1e3, args.error_rate, ready), daemon=True
+    )
+    stub.start()
+    try:
+        ready.wait(10)
+        return asyncio.run(run_load(args, f"http://127.0.0.1:{port}/"))
+    finally:
+        stub.terminate()
+
+def main():
+    """Run the load test for every entry count and print a report."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load", description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", default="10,50,100", help="comma separated entry counts")
+    parser.add_argument("--latency", type=float, default=50, help="mean stub latency in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate-limit", type=float, default=0, help="requests per second, 0 for unlimited")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    counts = [int(count) for count in args.entries.split(",")]
+    if len(counts) == 1:
+        args.entries = counts[0]
+        result = run_single(args)
+        print(json.dumps(result) if args.json else result)
+        return
+
+    # A fresh process per entry count, so peak RSS is not carried over
+    results = []
+    for count in counts:
+        argv = [sys.executable, "-m", "benchmarks.load", "--json", "--entries", str(count)]
+        argv += ["--latency", str(args.latency), "--error-rate", str(args.error_rate)]
+        argv += ["--concurrency", str(args.concurrency), "--rate-limit", str(args.rate_limit)]
+        output = subprocess.run(argv, cwd=REPO, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+    columns = [
+        "entries", "loaded", "entities", "setup_s", "refresh_s", "requests_per_s", "parse_s", "failed",
+        "loop_lag_max_ms", "loop_lag_p99_ms", "rss_peak_mib",
+    ]
+    print(" ".join(f"{column:>15}" for column in columns))
+    for result in results:
+        print(" ".join(f"{result[column]!s:>15}" for column in columns))
+
+if __name__ == "__main__":
+    main()
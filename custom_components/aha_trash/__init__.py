@@ -1,41 +1,86 @@
 """The AHA Trash Pickup integration."""
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import date as dt_date, timedelta
 
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import voluptuous as vol
+
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.util import dt as dt_util
 from homeassistant.const import Platform
-from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.util import dt as dt_util
+import homeassistant.helpers.config_validation as cv
 
-from .const import DOMAIN, CONF_GEMEINDE, CONF_STRASSE, CONF_HAUSNR, CONF_HAUSNRADDON, CONF_LADEORT, ABFALLARTEN, BASE_URL
+from .const import (
+    DOMAIN, CONF_GEMEINDE, CONF_STRASSE, CONF_HAUSNR, CONF_HAUSNRADDON, CONF_LADEORT, ABFALLARTEN,
+    CONF_CONCURRENCY, CONF_REFRESH_WINDOW, CONF_RATE_LIMIT, CONF_PARSE_PROCESSES, CONF_CALENDAR_EVENT_LIMIT,
+    DEFAULT_CONCURRENCY, DEFAULT_REFRESH_WINDOW, DEFAULT_RATE_LIMIT, DATA_SCHEDULER,
+    STORAGE_VERSION, CACHE_SCHEMA, CACHE_MAX_AGE, HORIZON_MIN, HORIZON_FIELD, SCHEDULE_RETENTION,
+    SIGNAL_COORDINATORS, COMBINED_EVENT_LIMIT, DATA_CALENDAR_EVENT_LIMIT,
+)
+from .client import async_get_client
+from .ics import AHATrashIcsView
+from .entity import build_snapshot
+from .executor import async_parse, async_setup_executor
+from .history import PickupHistory
+from .parser import parse_schedule
+from .schedule import build_schedule, horizon, merge_dates
+from .stats import FetchStats, RefreshRecord
+from .timeline import PickupTimeline
+from .scheduler import AHAFetchScheduler
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 PLATFORMS = [Platform.BINARY_SENSOR, Platform.SENSOR, Platform.CALENDAR]
 
+DOMAIN_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_CONCURRENCY, default=DEFAULT_CONCURRENCY): cv.positive_int,
+        vol.Optional(CONF_REFRESH_WINDOW, default=timedelta(seconds=DEFAULT_REFRESH_WINDOW)): cv.time_period,
+        vol.Optional(CONF_RATE_LIMIT, default=DEFAULT_RATE_LIMIT): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_PARSE_PROCESSES, default=False): cv.boolean,
+        vol.Optional(CONF_CALENDAR_EVENT_LIMIT, default=COMBINED_EVENT_LIMIT): cv.positive_int,
+    }
+)
+CONFIG_SCHEMA = vol.Schema({vol.Optional(DOMAIN): DOMAIN_SCHEMA}, extra=vol.ALLOW_EXTRA)
+
+async def async_setup(hass, config):
+    """Set up the domain-wide fetch scheduler."""
+    conf = config.get(DOMAIN) or DOMAIN_SCHEMA({})
+    hass.data[DATA_SCHEDULER] = AHAFetchScheduler(
+        hass,
+        concurrency=conf[CONF_CONCURRENCY],
+        window=conf[CONF_REFRESH_WINDOW],
+        rate_limit=conf[CONF_RATE_LIMIT],
+    )
+    async_get_client(hass)
+    async_setup_executor(hass, conf[CONF_PARSE_PROCESSES])
+    hass.data[DATA_CALENDAR_EVENT_LIMIT] = conf[CONF_CALENDAR_EVENT_LIMIT]
+    async_setup_services(hass)
+    hass.http.register_view(AHATrashIcsView())
+    return True
+
 async def async_setup_entry(hass, entry):
     """Set up AHA Trash Pickup from a config entry."""
-    session = async_get_clientsession(hass)
-    coordinator = AHATrashCoordinator(hass, session, entry)
-    await coordinator.async_config_entry_first_refresh()
+    scheduler = hass.data[DATA_SCHEDULER]
+    coordinator = AHATrashCoordinator(
+        hass, async_get_client(hass), entry, scheduler.breaker, scheduler.async_throttle
+    )
+    if await coordinator.async_load_cache():
+        # Entities come up from the cache, fresh data is fetched in the background
+        scheduler.async_enqueue(coordinator)
+    else:
+        await scheduler.async_run(coordinator.async_config_entry_first_refresh)
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    async_dispatcher_send(hass, SIGNAL_COORDINATORS)
 
-    # Schedule daily update at 7 AM local time
-    def async_schedule_daily_update():
-        now = dt_util.now()
-        next_update = now.replace(hour=7, minute=0, second=0, microsecond=0)
-        if next_update < now:
-            next_update += timedelta(days=1)
-
-        async def async_daily_refresh(_):
-            """Refresh data and reschedule."""
-            await coordinator.async_request_refresh()
-            async_schedule_daily_update()
-
-        async_track_point_in_time(hass, async_daily_refresh, next_update)
-
-    async_schedule_daily_update()
+    # Daily update at 7 AM local time, staggered across all entries
+    entry.async_on_unload(scheduler.async_register(coordinator))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
@@ -45,54 +90,272 @@ async def async_unload_entry(hass, entry):
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     #await hass.config_entries.async_forward_entry_unload(entry, "binary_sensor")
     hass.data[DOMAIN].pop(entry.entry_id)
+    async_dispatcher_send(hass, SIGNAL_COORDINATORS)
     return unload_ok
 
+async def async_remove_entry(hass, entry):
+    """Remove the cached schedule and the pickup history of a deleted config entry."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
+    await PickupHistory(hass, entry.entry_id).async_remove()
+
 class AHATrashCoordinator(DataUpdateCoordinator):
     """AHA Trash data update coordinator."""
 
-    def __init__(self, hass, session, entry):
+    def __init__(self, hass, client, entry, breaker=None, throttle=None):
         """Initialize coordinator."""
-        self.session = session
+        self.client = client
         self.config = entry.data
         self.entry = entry
-        super().__init__(hass, _LOGGER, name=DOMAIN)
+        self.breaker = breaker
+        # Waits for the rate limit before requests beyond the one of a scheduler run
+        self.throttle = throttle
+        # Retry attempt of the running refresh, and the time of the last successful fetch
+        self.retries = 0
+        self.last_success_time = None
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+        # Fingerprint of the last parsed response, and the trash types to notify
+        self._fingerprint = None
+        self._changed = None
+        self.stats = FetchStats()
+        # Archive of passed pickups, and the data it was last updated from
+        self.history = PickupHistory(hass, entry.entry_id)
+        self._recorded = None
+        # Presentation state per trash type, derived once per update and when the cached data expires
+        self._snapshots = {}
+        self._unsub_expiry = None
+        super().__init__(hass, _LOGGER, name=DOMAIN, always_update=False)
+        self._timeline = PickupTimeline(hass, self)
+
+    @callback
+    def async_update_listeners(self):
+        """Update the listeners of changed trash types, or all if unknown.
+
+        Listeners without a trash type are called on every change.
+        """
+        changed, self._changed = self._changed, None
+        self._snapshots = {}
+        self._async_arm_expiry()
+        self._timeline.async_rebuild()
+        if self.data and self.data is not self._recorded:
+            self._recorded = self.data
+            self.hass.async_create_background_task(
+                self.history.async_record(self.data), f"{DOMAIN} history {self.entry.entry_id}"
+            )
+        for update_callback, abfallart in list(self._listeners.values()):
+            if changed is None or abfallart is None or abfallart in changed:
+                update_callback()
+
+    @callback
+    def async_set_timeline_data(self, data, changed):
+        """Set data advanced by the timeline, keeping the refresh state."""
+        self.data = data
+        self._changed = changed
+        self.async_update_listeners()
+
+    @callback
+    def _async_arm_expiry(self):
+        """Notify all listeners once the last fetched data is too old to be served."""
+        if self._unsub_expiry is not None:
+            self._unsub_expiry()
+            self._unsub_expiry = None
+        if self.last_success_time is None:
+            return
+        expiry = self.last_success_time + CACHE_MAX_AGE
+        if expiry > dt_util.utcnow():
+            self._unsub_expiry = async_track_point_in_utc_time(self.hass, self._async_expired, expiry)
+
+    @callback
+    def _async_expired(self, _):
+        """Derive the snapshots again, failed refreshes in a row do not notify the listeners."""
+        self._unsub_expiry = None
+        self.async_update_listeners()
+
+    async def async_shutdown(self):
+        """Cancel the timers and any scheduled refresh."""
+        self._timeline.async_stop()
+        if self._unsub_expiry is not None:
+            self._unsub_expiry()
+            self._unsub_expiry = None
+        await super().async_shutdown()
+
+    def known_abfallarten(self):
+        """Return the current trash types, followed by those only left in the archive."""
+        current = list(self.data or ())
+        return current + [abfallart for abfallart in self.history.types() if abfallart not in current]
+
+    def known_dates(self, abfallart):
+        """Return the current and the archived dates of a trash type."""
+        item = (self.data or {}).get(abfallart)
+        current = [item["dates"]] if item else []
+        return current + [self.history.dates(abfallart)]
+
+    def has_data(self, abfallart):
+        """Return True if data of a trash type can be served, also after failed refreshes."""
+        if self.data is None or abfallart not in self.data:
+            return False
+        if self.last_update_success:
+            return True
+        return self.last_success_time is not None and dt_util.utcnow() - self.last_success_time < CACHE_MAX_AGE
+
+    def snapshot(self, abfallart):
+        """Return the presentation state of a trash type as of the last update."""
+        snapshot = self._snapshots.get(abfallart)
+        if snapshot is None:
+            snapshot = self._snapshots[abfallart] = build_snapshot(self, abfallart)
+        return snapshot
+
+    async def async_load_cache(self):
+        """Load the last parsed result from disk, return True if it is usable."""
+        try:
+            cache = await self._store.async_load()
+        except HomeAssistantError as err:
+            _LOGGER.warning(f"Discarding unreadable cache for {self.entry.title}: {err}")
+            await self._store.async_remove()
+            return False
+        if cache is None:
+            return False
+        try:
+            if cache["schema"] != CACHE_SCHEMA:
+                raise ValueError(f"schema {cache['schema']}")
+            fetched = dt_util.parse_datetime(cache["fetched"])
+            if fetched is None or dt_util.utcnow() - fetched > CACHE_MAX_AGE:
+                raise ValueError("cache is stale")
+            dates_by_type = {}
+            for abfallart, dates in cache["data"].items():
+                if abfallart not in ABFALLARTEN:
+                    raise ValueError(f"unexpected entry {abfallart}")
+                dates_by_type[abfallart] = [dt_date.fromisoformat(d) for d in dates]
+            result = build_schedule(dates_by_type, dt_util.now().date())
+            if not result:
+                raise ValueError("cache is empty")
+        except (KeyError, TypeError, AttributeError, ValueError) as err:
+            _LOGGER.debug(f"Discarding cache for {self.entry.title}: {err}")
+            await self._store.async_remove()
+            return False
+        self.last_success_time = fetched
+        self.async_set_updated_data(result)
+        return True
 
     async def _async_update_data(self):
-        """Fetch data from API."""
-        data = {
+        """Fetch data from API and record the refresh timings."""
+        record = RefreshRecord()
+        record.retries = self.retries
+        try:
+            result = await self._async_fetch_data(record)
+        except UpdateFailed as err:
+            record.finish(str(err))
+            raise
+        else:
+            record.finish("unchanged" if result is self.data else "success")
+            self.last_success_time = dt_util.utcnow()
+        finally:
+            self.stats.async_add_record(record)
+        return result
+
+    async def _async_fetch_page(self, record, form, best_effort=False):
+        """Fetch a schedule page, return the response.
+
+        Best-effort fetches are throttled, untraced and leave the breaker alone,
+        their failures say nothing about the AHA site.
+        """
+        breaker = None if best_effort else self.breaker
+        if best_effort:
+            if self.breaker is not None and self.breaker.state != "closed":
+                raise UpdateFailed("Fetching paused after repeated failures of the AHA site")
+            if self.throttle is not None:
+                await self.throttle()
+        elif breaker is not None and not breaker.allow():
+            raise UpdateFailed("Fetching paused after repeated failures of the AHA site")
+        try:
+            resp = await self.client.async_request(form, record=None if best_effort else record)
+            if resp.status != 200:
+                raise UpdateFailed(f"Error response {resp.status}")
+        except Exception as err:
+            if breaker is not None:
+                breaker.record_failure()
+            raise UpdateFailed(f"Fetch failed: {err}")
+        if breaker is not None:
+            breaker.record_success()
+        record.size += len(resp.body)
+        return resp
+
+    async def _async_parse_page(self, record, resp):
+        """Return the valid dates per trash type of a fetched page."""
+        start = time.perf_counter()
+        dates_by_type = await async_parse(self.hass, parse_schedule, resp.body, resp.charset)
+        record.parse += time.perf_counter() - start
+        for abfallart in ABFALLARTEN:
+            if abfallart not in dates_by_type:
+                _LOGGER.debug(f"Trash type {abfallart} not found")
+        return dates_by_type
+
+    def _horizon_short(self, dates_by_type, today):
+        """Return True if next year's schedule should be fetched as well."""
+        last = horizon(dates_by_type)
+        return last is not None and last.year == today.year and last - today < HORIZON_MIN
+
+    async def _async_fetch_data(self, record):
+        """Fetch the schedule page, and next year's page while the known horizon is short."""
+        form = {
             "gemeinde": self.config[CONF_GEMEINDE],
             "strasse": self.config[CONF_STRASSE],
             "hausnr": self.config[CONF_HAUSNR],
             "hausnraddon": self.config.get(CONF_HAUSNRADDON, ""),
             "ladeort": self.config.get(CONF_LADEORT, ""),
         }
-        try:
-            async with self.session.post(BASE_URL, data=data, timeout=10) as resp:
-                if resp.status != 200:
-                    raise UpdateFailed(f"Error response {resp.status}")
-                text = await resp.text()
-        except Exception as err:
-            raise UpdateFailed(f"Fetch failed: {err}")
+        resp = await self._async_fetch_page(record, form)
 
-        tomorrow = (datetime.today() + timedelta(days=1)).strftime("%d.%m.%Y")
-        result = {}
-        import re
-        for abfallart in ABFALLARTEN:
-            try:
-                beg = text.index(f'<strong>{abfallart}')
-                end = text.index('colspan="3"', beg)
-                slice_text = text[beg:end]
-                termine = re.findall(r"\w{2}, (\d{2}\.\d{2}\.\d{4})", slice_text)
-                if not termine:
-                    continue
-                next_date = termine[0]
-                result[abfallart] = {
-                    "next_date": next_date,
-                    "is_tomorrow": next_date == tomorrow,
-                    "all_dates": termine,
-                }
-            except ValueError:
-                _LOGGER.debug(f"Trash type {abfallart} not found")
-        if not result:
+        today = dt_util.now().date()
+        existing = {abfallart: item["dates"] for abfallart, item in (self.data or {}).items()}
+        fingerprint = (resp.digest, today)
+        if fingerprint == self._fingerprint and self.data and not self._horizon_short(existing, today):
+            # Identical page on the same day, nothing to rebuild or notify
+            await self._async_save_cache(self.data)
+            return self.data
+
+        fetched = await self._async_parse_page(record, resp)
+        if not fetched:
             raise UpdateFailed("No trash data parsed")
+        # Dates of earlier fetches outside of this page are kept, so the horizon never shrinks
+        dates_by_type = merge_dates(existing, fetched, today - SCHEDULE_RETENTION)
+
+        if self._horizon_short(dates_by_type, today):
+            try:
+                resp = await self._async_fetch_page(
+                    record, form | {HORIZON_FIELD: today.year + 1}, best_effort=True
+                )
+            except UpdateFailed as err:
+                _LOGGER.debug(f"Next year's schedule not available for {self.entry.title}: {err}")
+            else:
+                next_year = await self._async_parse_page(record, resp)
+                dates_by_type = merge_dates(dates_by_type, next_year, today - SCHEDULE_RETENTION)
+
+        start = time.perf_counter()
+        result = build_schedule(dates_by_type, today)
+        record.parse += time.perf_counter() - start
+        self._fingerprint = fingerprint
+
+        if self.data is not None and self.last_update_success:
+            previous = self.data
+            changed = {
+                abfallart for abfallart in previous.keys() | result.keys()
+                if previous.get(abfallart) != result.get(abfallart)
+            }
+            if changed:
+                self._changed = changed
+            else:
+                # Keep the previous object, so listeners are not called at all
+                result = previous
+        await self._async_save_cache(result)
         return result
+
+    async def _async_save_cache(self, result):
+        """Persist the parsed result together with the fetch time."""
+        await self._store.async_save({
+            "schema": CACHE_SCHEMA,
+            "fetched": dt_util.utcnow().isoformat(),
+            "data": {
+                abfallart: [d.isoformat() for d in item["dates"]]
+                for abfallart, item in result.items()
+            },
+        })
@@ -0,0 +1,179 @@
+"""Persistent index of municipalities and streets for AHA Trash Pickup."""
+import asyncio
+import logging
+from bisect import bisect_left
+
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, DATA_ADDRESS_INDEX, STORAGE_VERSION, ADDRESS_INDEX_TTL, ADDRESS_INDEX_SAVE_DELAY
+from .form_options import fetch_form_options_gemeinde, fetch_form_options_strasse
+
+_LOGGER = logging.getLogger(__name__)
+
+# Fetch key of the municipality list, streets are keyed by municipality
+_GEMEINDEN_KEY = "\0gemeinden"
+
+class OptionIndex:
+    """Form options sorted by case-folded label for prefix search."""
+
+    __slots__ = ("fetched", "_keys", "_values", "_labels")
+
+    def __init__(self, options, fetched):
+        """Initialize from a value to label mapping."""
+        items = sorted((label.casefold(), value, label) for value, label in options.items())
+        self._keys = tuple(item[0] for item in items)
+        self._values = tuple(item[1] for item in items)
+        self._labels = tuple(item[2] for item in items)
+        self.fetched = fetched
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def stale(self):
+        """Return True if the options should be refreshed."""
+        return dt_util.utcnow() - self.fetched > ADDRESS_INDEX_TTL
+
+    def as_dict(self):
+        """Return the options as value to label mapping, sorted by label."""
+        return dict(zip(self._values, self._labels))
+
+    def search(self, prefix, limit=None):
+        """Return the options whose label starts with prefix, case-insensitive."""
+        prefix = prefix.casefold()
+        result = {}
+        index = bisect_left(self._keys, prefix)
+        while index < len(self._keys) and self._keys[index].startswith(prefix):
+            result[self._values[index]] = self._labels[index]
+            if limit is not None and len(result) >= limit:
+                break
+            index += 1
+        return result
+
+    def resolve(self, query):
+        """Return the options matching an option value, a label or a label prefix."""
+        query = query.strip()
+        if query in self._values:
+            index = self._values.index(query)
+            return {query: self._labels[index]}
+        matches = self.search(query)
+        exact = {value: label for value, label in matches.items() if label.casefold() == query.casefold()}
+        return exact or matches
+
+    def as_storage(self):
+        """Return the options for the store."""
+        return {"fetched": self.fetched.isoformat(), "options": list(zip(self._values, self._labels))}
+
+    @classmethod
+    def from_storage(cls, data):
+        """Create from stored options, None if they are unusable."""
+        fetched = dt_util.parse_datetime(data["fetched"])
+        if fetched is None:
+            return None
+        return cls(dict(data["options"]), fetched)
+
+class AddressIndex:
+    """Municipalities and their streets, loaded once and shared by all config flows.
+
+    Options are persisted and served from memory. Stale options are served
+    as well while they are refreshed in the background.
+    """
+
+    def __init__(self, hass):
+        """Initialize index."""
+        self.hass = hass
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.address_index")
+        self._gemeinden = None
+        self._strassen = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._fetching = {}
+
+    async def _async_load(self):
+        """Load the persisted index once."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                stored = await self._store.async_load() or {}
+                if stored.get("gemeinden"):
+                    self._gemeinden = OptionIndex.from_storage(stored["gemeinden"])
+                for gemeinde, data in stored.get("strassen", {}).items():
+                    if (strassen := OptionIndex.from_storage(data)) is not None:
+                        self._strassen[gemeinde] = strassen
+            except Exception as err:
+                _LOGGER.warning(f"Discarding unreadable address index: {err}")
+                self._gemeinden = None
+                self._strassen = {}
+
+    @callback
+    def _async_schedule_save(self):
+        """Persist the index after a short delay."""
+        self._store.async_delay_save(self._data_to_save, ADDRESS_INDEX_SAVE_DELAY)
+
+    def _data_to_save(self):
+        """Return the index for the store."""
+        return {
+            "gemeinden": self._gemeinden.as_storage() if self._gemeinden else None,
+            "strassen": {gemeinde: strassen.as_storage() for gemeinde, strassen in self._strassen.items()},
+        }
+
+    async def _async_fetch(self, key, fetch):
+        """Fetch options, sharing a running fetch of the same key."""
+        task = self._fetching.get(key)
+        if task is None:
+            task = self._fetching[key] = self.hass.async_create_task(fetch())
+            task.add_done_callback(lambda _: self._fetching.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _async_refresh_gemeinden(self, run):
+        """Fetch the municipalities into the index."""
+        options = await self._async_fetch(_GEMEINDEN_KEY, lambda: fetch_form_options_gemeinde(self.hass, run))
+        if options:
+            self._gemeinden = OptionIndex(options, dt_util.utcnow())
+            self._async_schedule_save()
+        return self._gemeinden
+
+    async def _async_refresh_strassen(self, gemeinde, run):
+        """Fetch the streets of a municipality into the index."""
+        options = await self._async_fetch(gemeinde, lambda: fetch_form_options_strasse(self.hass, gemeinde, run))
+        if options:
+            self._strassen[gemeinde] = OptionIndex(options, dt_util.utcnow())
+            self._async_schedule_save()
+        return self._strassen.get(gemeinde)
+
+    async def async_get_gemeinden(self, run=None):
+        """Return the municipality index, None if it cannot be loaded.
+
+        Requests are sent through run, e.g. the scheduler to respect its limits.
+        """
+        await self._async_load()
+        if self._gemeinden is None:
+            return await self._async_refresh_gemeinden(run)
+        if self._gemeinden.stale and _GEMEINDEN_KEY not in self._fetching:
+            self.hass.async_create_background_task(
+                self._async_refresh_gemeinden(run), f"{DOMAIN} address index refresh"
+            )
+        return self._gemeinden
+
+    async def async_get_strassen(self, gemeinde, run=None):
+        """Return the street index of a municipality, None if it cannot be loaded."""
+        await self._async_load()
+        strassen = self._strassen.get(gemeinde)
+        if strassen is None:
+            return await self._async_refresh_strassen(gemeinde, run)
+        if strassen.stale and gemeinde not in self._fetching:
+            self.hass.async_create_background_task(
+                self._async_refresh_strassen(gemeinde, run), f"{DOMAIN} address index refresh {gemeinde}"
+            )
+        return strassen
+
+@callback
+def async_get_address_index(hass):
+    """Return the domain-wide address index, creating it on first use."""
+    if DATA_ADDRESS_INDEX not in hass.data:
+        hass.data[DATA_ADDRESS_INDEX] = AddressIndex(hass)
+    return hass.data[DATA_ADDRESS_INDEX]
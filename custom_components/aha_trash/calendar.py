@@ -1,10 +1,22 @@
 """Calendar platform for AHA Trash Pickup."""
-from datetime import date as dt_date, timedelta
+import asyncio
+import logging
+from abc import abstractmethod
+from datetime import timedelta
 
 from homeassistant.components.calendar import CalendarEntity, CalendarEvent
-from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.core import callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
-from .const import DOMAIN, ABFALLARTEN, MANUFACTURER
+from .const import (
+    DOMAIN, ABFALLARTEN, COMBINED_EVENT_LIMIT, SIGNAL_COORDINATORS, DATA_DOMAIN_CALENDAR, DATA_CALENDAR_EVENT_LIMIT,
+    DOMAIN_CALENDAR_COOLDOWN,
+)
+from .entity import AHATrashEntity, AHATrashTypeEntity
+from .schedule import merge_pickups
+
+_LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup_entry(hass, entry, async_add_entities):
@@ -14,68 +26,196 @@ async def async_setup_entry(hass, entry, async_add_entities):
         AHATrashCalendar(coordinator, abfallart)
         for abfallart in ABFALLARTEN
     ]
+    entities.append(AHATrashAddressCalendar(coordinator))
+    # The domain-wide calendar is added by one of the loaded entries
+    owners = hass.data.setdefault(DATA_DOMAIN_CALENDAR, {})
+    if not owners:
+        entities.append(AHATrashDomainCalendar())
+    owners[entry.entry_id] = async_add_entities
+
+    @callback
+    def async_remove_owner():
+        owners.pop(entry.entry_id, None)
+
+    entry.async_on_unload(async_remove_owner)
     async_add_entities(entities)
 
 
-class AHATrashCalendar(CalendarEntity):
+class AHATrashCalendar(AHATrashTypeEntity, CalendarEntity):
     """Calendar entity for a single trash type at an address."""
 
     def __init__(self, coordinator, abfallart):
         """Initialize the calendar."""
-        self.coordinator = coordinator
-        self.abfallart = abfallart
+        super().__init__(coordinator, abfallart)
         self._attr_unique_id = f"{coordinator.entry.entry_id}_{abfallart.lower().replace(' ', '_')}_calendar"
         self._attr_name = abfallart
 
+    def _event(self, d):
+        """Return an all-day calendar event for a pickup date."""
+        return CalendarEvent(start=d, end=d + timedelta(days=1), summary=self.abfallart)
+
     @property
-    def device_info(self):
-        """Return device info to group entities under the address device."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self.coordinator.entry.entry_id)},
-            name=self.coordinator.entry.title,
-            manufacturer=MANUFACTURER,
-            entry_type=DeviceEntryType.SERVICE,
-        )
+    def event(self):
+        """Return the next upcoming calendar event."""
+        return self.snapshot.event
+
+    async def async_get_events(self, hass, start_date, end_date):
+        """Return all calendar events in the given time range, passed ones from the history."""
+        await self.coordinator.history.async_load()
+        sources = [(self.abfallart, dates) for dates in self.coordinator.known_dates(self.abfallart)]
+        return [self._event(d) for d, _ in merge_pickups(sources, start_date.date(), end_date.date())]
+
+
+class AHATrashCombinedCalendar(CalendarEntity):
+    """Calendar merging the pickups of several trash types in date order."""
 
-    def _get_dates(self):
-        """Parse all stored pickup dates into date objects."""
-        data = self.coordinator.data.get(self.abfallart, {})
-        dates = []
-        for date_str in data.get("all_dates", []):
-            try:
-                day, month, year = map(int, date_str.split("."))
-                dates.append(dt_date(year, month, day))
-            except ValueError:
-                pass
-        return dates
+    # Coordinator listeners write the state
+    _attr_should_poll = False
+
+    @abstractmethod
+    def _coordinators(self):
+        """Return the coordinators of the merged addresses."""
+
+    def _sources(self):
+        """Return (key, PickupDates) pairs of the merged schedules and their archived dates."""
+        sources = []
+        for coordinator in self._coordinators():
+            for abfallart in coordinator.known_abfallarten():
+                key = self._key(coordinator, abfallart)
+                sources.extend((key, dates) for dates in coordinator.known_dates(abfallart))
+        return sources
+
+    @abstractmethod
+    def _key(self, coordinator, abfallart):
+        """Return the key events of a trash type at an address are built from."""
+
+    @abstractmethod
+    def _event(self, d, key):
+        """Return an all-day calendar event for a pickup of a source."""
 
     @property
     def event(self):
-        """Return the next upcoming calendar event."""
-        today = dt_date.today()
-        upcoming = [d for d in self._get_dates() if d >= today]
-        if not upcoming:
+        """Return the next upcoming pickup over all trash types, from the next dates kept by the timelines."""
+        first = None
+        for coordinator in self._coordinators():
+            for abfallart, item in (coordinator.data or {}).items():
+                d = item["next_date"]
+                if d is not None and (first is None or d < first[0]):
+                    first = d, coordinator, abfallart
+        if first is None:
             return None
-        d = upcoming[0]
-        return CalendarEvent(start=d, end=d + timedelta(days=1), summary=self.abfallart)
+        d, coordinator, abfallart = first
+        return self._event(d, self._key(coordinator, abfallart))
 
     async def async_get_events(self, hass, start_date, end_date):
-        """Return all calendar events in the given time range."""
-        start = start_date.date()
-        end = end_date.date()
-        events = []
-        for d in self._get_dates():
-            if start <= d < end:
-                events.append(CalendarEvent(start=d, end=d + timedelta(days=1), summary=self.abfallart))
-        return events
+        """Return the events in the given time range, at most calendar_event_limit."""
+        await asyncio.gather(*(coordinator.history.async_load() for coordinator in self._coordinators()))
+        limit = hass.data.get(DATA_CALENDAR_EVENT_LIMIT, COMBINED_EVENT_LIMIT)
+        pickups = merge_pickups(self._sources(), start_date.date(), end_date.date(), limit)
+        return [self._event(d, key) for d, key in pickups]
+
+
+class AHATrashAddressCalendar(AHATrashEntity, AHATrashCombinedCalendar):
+    """Calendar with the pickups of all trash types at an address, disabled by default."""
+
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator):
+        """Initialize the calendar."""
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_combined_calendar"
+        self._attr_name = "Alle Abholungen"
+
+    def _coordinators(self):
+        return [self.coordinator]
+
+    def _key(self, coordinator, abfallart):
+        return abfallart
+
+    def _event(self, d, key):
+        return CalendarEvent(start=d, end=d + timedelta(days=1), summary=key)
 
     @property
     def available(self):
-        """Return if entity is available."""
-        return self.coordinator.last_update_success and self.abfallart in self.coordinator.data
+        """Return if any trash type of the address can be served."""
+        return any(self.coordinator.snapshot(abfallart).available for abfallart in ABFALLARTEN)
 
     async def async_added_to_hass(self):
-        """Connect to coordinator."""
+        """Connect to coordinator, for changes of any trash type."""
+        self.async_on_remove(self.coordinator.async_add_listener(self.async_write_ha_state))
+
+
+class AHATrashDomainCalendar(AHATrashCombinedCalendar):
+    """Calendar with the pickups of all addresses."""
+
+    _attr_unique_id = f"{DOMAIN}_combined_calendar"
+    _attr_name = "aha Abfuhrtermine"
+
+    def __init__(self):
+        """Initialize the calendar."""
+        self._unsubs = {}
+        self._debouncer = None
+
+    def _coordinators(self):
+        return list(self.hass.data.get(DOMAIN, {}).values())
+
+    def _key(self, coordinator, abfallart):
+        return coordinator, abfallart
+
+    def _event(self, d, key):
+        coordinator, abfallart = key
+        title = coordinator.entry.title
+        return CalendarEvent(
+            start=d, end=d + timedelta(days=1), summary=f"{abfallart} ({title})", location=title
+        )
+
+    @property
+    def available(self):
+        """Return if any address can be served."""
+        return any(
+            coordinator.snapshot(abfallart).available
+            for coordinator in self._coordinators()
+            for abfallart in ABFALLARTEN
+        )
+
+    @callback
+    def _async_unsubscribe(self):
+        while self._unsubs:
+            self._unsubs.popitem()[1]()
+
+    @callback
+    def _async_subscribe(self):
+        """Listen to the coordinators of entries set up since the last call, stop listening to unloaded ones."""
+        coordinators = self._coordinators()
+        for coordinator in self._unsubs.keys() - set(coordinators):
+            self._unsubs.pop(coordinator)()
+        for coordinator in coordinators:
+            if coordinator not in self._unsubs:
+                self._unsubs[coordinator] = coordinator.async_add_listener(self._debouncer.async_schedule_call)
+
+    @callback
+    def _async_coordinators_changed(self):
+        self._async_subscribe()
+        self._debouncer.async_schedule_call()
+
+    async def async_added_to_hass(self):
+        """Connect to the coordinators of all entries, also of entries set up later."""
+        # Updates of many coordinators, e.g. at setup or midnight, are written once per cooldown
+        self._debouncer = Debouncer(
+            self.hass, _LOGGER, cooldown=DOMAIN_CALENDAR_COOLDOWN, immediate=True,
+            function=self.async_write_ha_state,
+        )
+        self._async_subscribe()
         self.async_on_remove(
-            self.coordinator.async_add_listener(self.async_write_ha_state)
+            async_dispatcher_connect(self.hass, SIGNAL_COORDINATORS, self._async_coordinators_changed)
         )
+        self.async_on_remove(self._async_unsubscribe)
+        self.async_on_remove(self._debouncer.async_shutdown)
+
+    async def async_will_remove_from_hass(self):
+        """Cancel the event alarms and hand the calendar over to another loaded entry."""
+        await super().async_will_remove_from_hass()
+        owners = self.hass.data.get(DATA_DOMAIN_CALENDAR, {})
+        owners.pop(self.platform.config_entry.entry_id, None)
+        if owners and not self.hass.is_stopping:
+            next(iter(owners.values()))([AHATrashDomainCalendar()])
@@ -0,0 +1,112 @@
+"""Shared HTTP client for the AHA form."""
+import asyncio
+import hashlib
+import logging
+
+import aiohttp
+
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+from .const import BASE_URL, DATA_CLIENT, REQUEST_TIMEOUT, CLIENT_CACHE_TTL
+from .stats import create_trace_config
+
+_LOGGER = logging.getLogger(__name__)
+
+class AHAResponse:
+    """Fully read response of the AHA form."""
+
+    __slots__ = ("status", "charset", "body", "digest")
+
+    def __init__(self, status, charset, body):
+        """Initialize response."""
+        self.status = status
+        self.charset = charset
+        self.body = body
+        self.digest = hashlib.sha1(body).digest()
+
+    def text(self):
+        """Return the decoded body."""
+        return self.body.decode(self.charset or "utf-8", errors="replace")
+
+class AHAClient:
+    """Send requests to the AHA form for config flows, services and coordinators.
+
+    Identical requests in flight are sent once and successful responses are
+    kept for a short time, so validating an address and the first refresh of
+    its entry, or several entries of the same address, share a single fetch.
+    """
+
+    def __init__(self, hass, session, cache_ttl=CLIENT_CACHE_TTL):
+        """Initialize client."""
+        self.hass = hass
+        self.session = session
+        self.cache_ttl = cache_ttl
+        self._timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        self._inflight = {}
+        self._cache = {}
+
+    @staticmethod
+    def _key(method, data):
+        """Return the cache key of a request, form values compare as sent."""
+        return method, tuple(sorted((name, str(value)) for name, value in (data or {}).items()))
+
+    async def async_request(self, data=None, method="POST", record=None):
+        """Return the response to a form request, shared with identical requests.
+
+        The RefreshRecord is only filled if this call sends the request.
+        """
+        key = self._key(method, data)
+        now = asyncio.get_running_loop().time()
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            task = self.hass.async_create_task(self._async_fetch(key, method, data, record))
+            # The request and the number of callers waiting for it
+            inflight = self._inflight[key] = [task, 0]
+            task.add_done_callback(lambda done: self._async_fetched(key, inflight, done))
+        task = inflight[0]
+        inflight[1] += 1
+        try:
+            # A cancelled caller must not cancel the request of the others
+            return await asyncio.shield(task)
+        finally:
+            inflight[1] -= 1
+            if not inflight[1] and not task.done():
+                # The last caller is gone, nobody needs the response anymore
+                task.cancel()
+                if self._inflight.get(key) is inflight:
+                    del self._inflight[key]
+
+    @callback
+    def _async_fetched(self, key, inflight, task):
+        """Forget a finished request and retrieve its error, the callers may all be gone."""
+        if self._inflight.get(key) is inflight:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+
+    async def _async_fetch(self, key, method, data, record):
+        """Send the request and cache a successful response."""
+        async with self.session.request(
+            method, BASE_URL, data=data, timeout=self._timeout, trace_request_ctx=record
+        ) as resp:
+            response = AHAResponse(resp.status, resp.charset, await resp.read())
+        if record is not None:
+            record.body_received()
+        if response.status == 200 and self.cache_ttl:
+            now = asyncio.get_running_loop().time()
+            self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+            self._cache[key] = (now + self.cache_ttl, response)
+        return response
+
+@callback
+def async_get_client(hass):
+    """Return the domain-wide client, creating it on first use."""
+    if DATA_CLIENT not in hass.data:
+        # Own session, so refresh timings can be traced
+        session = async_create_clientsession(hass, trace_configs=[create_trace_config()])
+        hass.data[DATA_CLIENT] = AHAClient(hass, session)
+    return hass.data[DATA_CLIENT]
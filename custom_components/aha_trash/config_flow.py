@@ -1,93 +1,22 @@
 """Config flow for AHA Trash Pickup integration."""
 import logging
-import re
 
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.const import Platform
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.selector import (
+    SelectOptionDict,
+    SelectSelector,
+    SelectSelectorConfig,
+    SelectSelectorMode,
+)
 
-from .const import DOMAIN, CONF_GEMEINDE, CONF_STRASSE, CONF_HAUSNR, CONF_HAUSNRADDON, CONF_LADEORT, ABFALLARTEN, BASE_URL
+from .address_index import async_get_address_index
+from .const import DOMAIN, CONF_GEMEINDE, CONF_STRASSE, CONF_HAUSNR, CONF_HAUSNRADDON, CONF_LADEORT
+from .form_options import LadeortRequired, fetch_form_options_ladeort, validate_address
 
 _LOGGER = logging.getLogger(__name__)
 
-async def fetch_form_options_gemeinde(hass):
-    """Fetch muncipial options from the form page."""
-    session = async_get_clientsession(hass)
-    try:
-        async with session.get(BASE_URL, timeout=10) as resp:
-            if resp.status != 200:
-                return None
-            text = await resp.text()
-    except Exception as err:
-        _LOGGER.error(f"Failed to fetch form page: {err}")
-        return None
-
-    gemeinde_match = re.search(r'<select[^>]+name="gemeinde"[^>]*>(.*?)</select>', text, re.DOTALL)
-    if not gemeinde_match:
-        return None
-    gemeinden = {}
-    for gemeinde in re.finditer(r'<option\s+value="([^"]*)"\s*(selected="selected")?\s*>(.*?)</option>', gemeinde_match.group(1)):
-        value = gemeinde.group(1).strip()
-        text_opt = gemeinde.group(3).strip()
-        if value:
-            gemeinden[value] = text_opt
-    return gemeinden
-
-async def fetch_form_options_strasse(hass, gemeinde):
-    """Fetch street options from the form page."""
-    session = async_get_clientsession(hass)
-    strassen = {}
-    for c in range(ord('A'), ord('Z')+1):
-        data = {
-            "gemeinde": gemeinde,
-            "von": chr(c)
-        }
-        try:
-            async with session.post(BASE_URL, data=data, timeout=10) as resp:
-                if resp.status != 200:
-                    return None
-                text = await resp.text()
-        except Exception as err:
-            _LOGGER.error(f"Failed to fetch form page: {err}")
-            return None
-
-        strasse_match = re.search(r'<select[^>]+name="strasse"[^>]*>(.*?)</select>', text, re.DOTALL)
-        if not strasse_match:
-            continue
-        for strasse in re.finditer(r'<option\s+value=["\'](.*?)["\']\s*>(.*?)</option>', strasse_match.group(1)):
-            value = strasse.group(1).strip()
-            text_opt = strasse.group(2).strip()
-            strassen[value] = text_opt
-    return strassen
-
-async def fetch_form_options_ladeort(hass, gemeinde, strasse, hausnr, hausnraddon):
-    """Fetch ladeort options from the form page."""
-    session = async_get_clientsession(hass)
-    ladeorte = {}
-    data = {
-        "gemeinde": gemeinde,
-        "strasse": strasse,
-        "hausnr": hausnr,
-        "hausnraddon": hausnraddon,
-    }
-    try:
-        async with session.post(BASE_URL, data=data, timeout=10) as resp:
-            if resp.status != 200:
-                return None
-            text = await resp.text()
-    except Exception as err:
-        _LOGGER.error(f"Failed to fetch form page: {err}")
-        return None
-    ladeort_match = re.search(r'<select[^>]+name="ladeort"[^>]*>(.*?)</select>', text, re.DOTALL)
-    if not ladeort_match:
-        return None
-    for ladeort in re.finditer(r'<option\s+value=["\'](.*?)["\']\s*>(.*?)</option>', ladeort_match.group(1)):
-        value = ladeort.group(1).strip()
-        text_opt = ladeort.group(2).strip()
-        ladeorte[value] = text_opt
-    return ladeorte
-
 class AHATrashConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for AHA Trash Pickup."""
 
@@ -97,6 +26,7 @@ class AHATrashConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Initialize flow."""
         self._gemeinden = {}
         self._strassen = {}
+        self._strassen_index = None
         self._selected_gemeinde_value = None
         self._selected_gemeinde_text = None
         self._selected_strasse_value = None
@@ -105,6 +35,12 @@ class AHATrashConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self._strassenraddon = None
         self._selected_ladeort_value = None
         self._selected_ladeort_text = None
+        # Ladeort options per address, taken from the validation response
+        self._ladeorte_by_address = {}
+
+    def _address_key(self):
+        """Return the address the ladeort options belong to."""
+        return (self._selected_gemeinde_value, self._selected_strasse_value, self._hausnr, self._hausnraddon)
 
     async def create_entry(self):
         """Try to return entry, if data is valid, raise LookupError in case of required ladeort, return None if no data available"""
@@ -115,31 +51,44 @@ class AHATrashConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             "hausnraddon": self._hausnraddon,
             "ladeort": self._selected_ladeort_value,
         }
-        session = async_get_clientsession(self.hass)
-        async with session.post(BASE_URL, data=data, timeout=10) as resp:
-            if resp.status != 200:
-                raise SystemError("Bad status")
-            text = await resp.text()
-            has_data = any("<strong>"+abf+"</strong>" in text for abf in ABFALLARTEN)
-            needs_ladeort = 'id="ladeort" name="ladeort"' in text
-            if needs_ladeort and not has_data:
-                raise LookupError("Needs ladeort")
-            if not has_data:
+        try:
+            if not await validate_address(self.hass, data):
                 return None
+        except LadeortRequired as err:
+            if err.ladeorte:
+                self._ladeorte_by_address[self._address_key()] = err.ladeorte
+            raise
+        return await self._async_create_address_entry(data, self._selected_strasse_text)
+
+    async def _async_create_address_entry(self, data, strasse_text):
+        """Create the entry for a validated address, abort if it is already configured."""
         unique_id = f"{data[CONF_GEMEINDE]}_{data[CONF_STRASSE]}_{data[CONF_HAUSNR]}{data[CONF_HAUSNRADDON]}"
         await self.async_set_unique_id(unique_id)
         self._abort_if_unique_id_configured()
         return self.async_create_entry(
-            title=f"{self._selected_strasse_text} {data[CONF_HAUSNR]}{data[CONF_HAUSNRADDON]}",
+            title=f"{strasse_text} {data[CONF_HAUSNR]}{data[CONF_HAUSNRADDON]}",
             data=data,
         )
 
+    async def async_step_import(self, import_data):
+        """Create an entry for an address validated by the bulk import service."""
+        data = {
+            "gemeinde": import_data[CONF_GEMEINDE],
+            "strasse": import_data[CONF_STRASSE],
+            "hausnr": import_data[CONF_HAUSNR],
+            "hausnraddon": import_data.get(CONF_HAUSNRADDON, ""),
+            "ladeort": import_data.get(CONF_LADEORT),
+        }
+        return await self._async_create_address_entry(data, import_data["strasse_text"])
+
     async def async_step_user(self, user_input=None):
         """Initial step: load options and show gemeinde selector."""
         errors = {}
         if not self._gemeinden:
-            self._gemeinden = await fetch_form_options_gemeinde(self.hass)
-            if not self._gemeinden:
+            gemeinden = await async_get_address_index(self.hass).async_get_gemeinden()
+            if gemeinden:
+                self._gemeinden = gemeinden.as_dict()
+            else:
                 errors["base"] = "fetch_failed"
 
         if user_input is not None and not errors:
@@ -164,13 +113,29 @@ class AHATrashConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_strasse(self, user_input=None):
         """Step: select strasse based on gemeinde."""
         errors = {}
-        self._strassen = await fetch_form_options_strasse(self.hass, self._selected_gemeinde_value)
+        if self._strassen_index is None:
+            index = async_get_address_index(self.hass)
+            self._strassen_index = await index.async_get_strassen(self._selected_gemeinde_value)
+            if self._strassen_index:
+                self._strassen = self._strassen_index.as_dict()
+        options = self._strassen
+
+        if user_input is not None:
+            strasse = user_input[CONF_STRASSE]
+            if self._strassen_index and strasse not in self._strassen:
+                # Typed text, resolve it as street name or prefix from the local index
+                matches = self._strassen_index.resolve(strasse)
+                if len(matches) == 1:
+                    strasse = next(iter(matches))
+                elif matches:
+                    errors[CONF_STRASSE] = "ambiguous_strasse"
+                    options = matches
+                else:
+                    errors[CONF_STRASSE] = "unknown_strasse"
 
         if user_input is not None and not errors:
-            self._selected_strasse_value = user_input[CONF_STRASSE]
-            self._selected_strasse_text = user_input[CONF_STRASSE]
-            if self._strassen:
-                self._selected_strasse_text = self._strassen.get(user_input[CONF_STRASSE])
+            self._selected_strasse_value = strasse
+            self._selected_strasse_text = self._strassen.get(strasse, strasse)
             self._hausnr = user_input[CONF_HAUSNR]
             self._hausnraddon = user_input[CONF_HAUSNRADDON]
             try:
@@ -183,9 +148,16 @@ class AHATrashConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             except LookupError:
                 return await self.async_step_ladeort()
 
+        strasse_selector = SelectSelector(
+            SelectSelectorConfig(
+                options=[SelectOptionDict(value=value, label=label) for value, label in options.items()],
+                custom_value=True,
+                mode=SelectSelectorMode.DROPDOWN,
+            )
+        )
         strasse_schema = vol.Schema(
             {
-                vol.Required(CONF_STRASSE): vol.In(self._strassen) if self._strassen else str,
+                vol.Required(CONF_STRASSE): strasse_selector if self._strassen else str,
                 vol.Required(CONF_HAUSNR, default=1): int,
                 vol.Optional(CONF_HAUSNRADDON, default=""): str,
             }
@@ -201,7 +173,12 @@ class AHATrashConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_ladeort(self, user_input=None):
         """Step: select ladeort based on address."""
         errors = {}
-        self._ladeorte = await fetch_form_options_ladeort(self.hass, self._selected_gemeinde_value, self._selected_strasse_value, self._hausnr, self._hausnraddon)
+        key = self._address_key()
+        if key not in self._ladeorte_by_address:
+            ladeorte = await fetch_form_options_ladeort(self.hass, *key)
+            if ladeorte:
+                self._ladeorte_by_address[key] = ladeorte
+        self._ladeorte = self._ladeorte_by_address.get(key)
 
         if user_input is not None and not errors:
             self._selected_ladeort_value = user_input[CONF_LADEORT]
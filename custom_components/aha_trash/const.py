@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 DOMAIN = "aha_trash"
 MANUFACTURER = "Abfallwirtschaft Region Hannover"
 
@@ -9,4 +11,98 @@ CONF_LADEORT = "ladeort"
 
 ABFALLARTEN = ["Restabfall", "Bioabfall", "Papier", "Leichtverpackungen"]
 
+# Icons per trash type, filled when the pickup is tomorrow
+ICONS = {
+    "Restabfall": ("mdi:trash-can", "mdi:trash-can-outline"),
+    "Bioabfall": ("mdi:food-apple", "mdi:food-apple-outline"),
+    "Papier": ("mdi:file-document", "mdi:file-document-outline"),
+    "Leichtverpackungen": ("mdi:recycle", "mdi:recycle-variant"),
+}
+ICON_DEFAULT = "mdi:delete"
+
 BASE_URL = "https://www.aha-region.de/abholtermine/abfuhrkalender/"
+
+# Seconds until a request to the AHA site is given up, and successful responses are reused
+REQUEST_TIMEOUT = 10
+CLIENT_CACHE_TTL = 120
+
+# Parallel requests when loading the street list, one per initial letter
+STRASSE_CONCURRENCY = 13
+
+CONF_CONCURRENCY = "concurrency"
+CONF_REFRESH_WINDOW = "refresh_window"
+CONF_RATE_LIMIT = "rate_limit"
+CONF_PARSE_PROCESSES = "parse_processes"
+CONF_CALENDAR_EVENT_LIMIT = "calendar_event_limit"
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_REFRESH_WINDOW = 1800
+DEFAULT_RATE_LIMIT = 2.0
+
+REFRESH_HOUR = 7
+
+# Retries of a failed refresh, delays in seconds double up to the maximum
+RETRY_ATTEMPTS = 5
+RETRY_BACKOFF = 60
+RETRY_BACKOFF_MAX = 1800
+
+# Consecutive failures pausing all fetches, and seconds until a probe is sent
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 300
+
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+DATA_CLIENT = f"{DOMAIN}_client"
+
+# Municipality and street lists shared by all config flows
+DATA_ADDRESS_INDEX = f"{DOMAIN}_address_index"
+ADDRESS_INDEX_TTL = timedelta(days=30)
+ADDRESS_INDEX_SAVE_DELAY = 10
+
+# Number of refreshes kept per entry for diagnostics
+STATS_HISTORY = 20
+
+# On-disk cache of the last parsed schedule per entry
+STORAGE_VERSION = 1
+CACHE_SCHEMA = 2
+CACHE_MAX_AGE = timedelta(days=14)
+
+# Bulk import service
+SERVICE_IMPORT_ADDRESSES = "import_addresses"
+ATTR_ADDRESSES = "addresses"
+ATTR_CSV = "csv"
+ATTR_DRY_RUN = "dry_run"
+
+# Schedule query service
+SERVICE_GET_SCHEDULE = "get_schedule"
+ATTR_ENTRY_ID = "entry_id"
+ATTR_ABFALLART = "abfallart"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_DAYS = "days"
+ATTR_LIMIT = "limit"
+
+# iCalendar feed of all entries at /api/aha_trash/all.ics
+ICS_ALL = "all"
+
+# Schedule horizon: fetch next year's page when fewer days are known ahead,
+# keep merged dates for a year after the pickup
+HORIZON_MIN = timedelta(days=42)
+HORIZON_FIELD = "jahr"
+SCHEDULE_RETENTION = timedelta(days=365)
+
+# Passed pickups are archived per entry for this long, the newest are found in the last bytes of the archive
+HISTORY_RETENTION = timedelta(days=5 * 365)
+HISTORY_TAIL = 8 * 1024
+
+# Combined calendars, default of the events returned per query and the signal sent when entries are set up or unloaded
+COMBINED_EVENT_LIMIT = 1000
+DATA_CALENDAR_EVENT_LIMIT = f"{DOMAIN}_calendar_event_limit"
+SIGNAL_COORDINATORS = f"{DOMAIN}_coordinators"
+DATA_DOMAIN_CALENDAR = f"{DOMAIN}_domain_calendar"
+# Seconds between state writes of the domain-wide calendar
+DOMAIN_CALENDAR_COOLDOWN = 1.0
+
+# Pages of at least this many bytes are parsed in a shared pool of workers
+PARSE_EXECUTOR_THRESHOLD = 32 * 1024
+PARSE_WORKERS = 2
+DATA_PARSE_EXECUTOR = f"{DOMAIN}_parse_executor"
@@ -0,0 +1,26 @@
+"""Diagnostics support for AHA Trash Pickup."""
+from homeassistant.components.diagnostics import async_redact_data
+
+from .const import DATA_SCHEDULER, DOMAIN, CONF_STRASSE, CONF_HAUSNR, CONF_HAUSNRADDON, CONF_LADEORT
+from .stats import async_domain_stats
+
+TO_REDACT = {CONF_STRASSE, CONF_HAUSNR, CONF_HAUSNRADDON, CONF_LADEORT}
+
+async def async_get_config_entry_diagnostics(hass, entry):
+    """Return diagnostics for a config entry, including all entries' aggregate."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "last_update_success": coordinator.last_update_success,
+        "last_success_time": coordinator.last_success_time,
+        "schedule": {
+            abfallart: {
+                "next_date": item["next_date"],
+                "is_tomorrow": item["is_tomorrow"],
+                "dates": len(item["dates"]),
+            }
+            for abfallart, item in (coordinator.data or {}).items()
+        },
+        "refreshes": coordinator.stats.as_dict(),
+        "domain": async_domain_stats(hass) | {"breaker": hass.data[DATA_SCHEDULER].breaker.as_dict()},
+    }
@@ -0,0 +1,68 @@
+"""Shared entity base for AHA Trash Pickup."""
+from collections import namedtuple
+from datetime import timedelta
+from types import MappingProxyType
+
+from homeassistant.components.calendar import CalendarEvent
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.entity import Entity
+
+from .const import DOMAIN, MANUFACTURER, ICONS, ICON_DEFAULT
+
+# Presentation state of a trash type, shared by its entities until the next update
+TrashSnapshot = namedtuple("TrashSnapshot", "available next_date is_tomorrow icon attributes event")
+
+def build_snapshot(coordinator, abfallart):
+    """Derive the presentation state of a trash type from the coordinator data."""
+    item = (coordinator.data or {}).get(abfallart) or {}
+    next_date = item.get("next_date")
+    is_tomorrow = item.get("is_tomorrow", False)
+    filled, outline = ICONS.get(abfallart, (ICON_DEFAULT, ICON_DEFAULT))
+    return TrashSnapshot(
+        available=coordinator.has_data(abfallart),
+        next_date=next_date,
+        is_tomorrow=is_tomorrow,
+        icon=filled if is_tomorrow else outline,
+        attributes=MappingProxyType({"next_date": next_date.strftime("%d.%m.%Y") if next_date else None}),
+        event=CalendarEvent(start=next_date, end=next_date + timedelta(days=1), summary=abfallart)
+        if next_date else None,
+    )
+
+class AHATrashEntity(Entity):
+    """Entity of an address, grouped under the address device."""
+
+    _attr_should_poll = False
+
+    def __init__(self, coordinator):
+        """Initialize the entity."""
+        self.coordinator = coordinator
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, coordinator.entry.entry_id)},
+            name=coordinator.entry.title,
+            manufacturer=MANUFACTURER,
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+class AHATrashTypeEntity(AHATrashEntity):
+    """Entity of a trash type, served from the snapshot of the last coordinator update."""
+
+    def __init__(self, coordinator, abfallart):
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self.abfallart = abfallart
+
+    @property
+    def snapshot(self):
+        """Return the presentation state of the trash type."""
+        return self.coordinator.snapshot(self.abfallart)
+
+    @property
+    def available(self):
+        """Return if entity is available, cached data is served while the site is down."""
+        return self.snapshot.available
+
+    async def async_added_to_hass(self):
+        """Connect to coordinator, for changes of this trash type."""
+        self.async_on_remove(
+            self.coordinator.async_add_listener(self.async_write_ha_state, self.abfallart)
+        )
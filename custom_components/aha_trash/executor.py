@@ -0,0 +1,40 @@
+"""Shared parse executor for AHA Trash Pickup."""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import callback
+
+from .const import DOMAIN, DATA_PARSE_EXECUTOR, PARSE_WORKERS, PARSE_EXECUTOR_THRESHOLD
+
+@callback
+def async_setup_executor(hass, processes=False):
+    """Create the executor all entries parse large pages in, reusing one created before of the same kind."""
+    kind = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    existing = hass.data.get(DATA_PARSE_EXECUTOR)
+    if existing is not None:
+        if isinstance(existing, kind):
+            return existing
+        # A config flow parsed a large page before setup, parses running on it still finish
+        existing.shutdown(wait=False)
+    if processes:
+        # Spawned workers do not inherit the state of the running event loop
+        executor = ProcessPoolExecutor(PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    else:
+        executor = ThreadPoolExecutor(PARSE_WORKERS, thread_name_prefix=f"{DOMAIN}_parse")
+    hass.data[DATA_PARSE_EXECUTOR] = executor
+
+    @callback
+    def async_shutdown(_):
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_shutdown)
+    return executor
+
+async def async_parse(hass, func, body, *args):
+    """Run a pure parse function, in the shared executor if the page is large."""
+    if len(body) < PARSE_EXECUTOR_THRESHOLD:
+        return func(body, *args)
+    executor = hass.data.get(DATA_PARSE_EXECUTOR) or async_setup_executor(hass)
+    return await asyncio.get_running_loop().run_in_executor(executor, func, body, *args)
@@ -0,0 +1,107 @@
+"""Option lists of the AHA address form."""
+import asyncio
+import logging
+
+from .client import async_get_client
+from .const import ABFALLARTEN, STRASSE_CONCURRENCY
+from .executor import async_parse
+from .parser import parse_options
+
+_LOGGER = logging.getLogger(__name__)
+
+async def _async_direct(target):
+    """Send a request right away."""
+    return await target()
+
+async def fetch_form_options_gemeinde(hass, run=None):
+    """Fetch muncipial options from the form page, the request is sent through run."""
+    run = run or _async_direct
+    try:
+        resp = await run(lambda: async_get_client(hass).async_request(method="GET"))
+        if resp.status != 200:
+            return None
+    except Exception as err:
+        _LOGGER.error(f"Failed to fetch form page: {err}")
+        return None
+    return await async_parse(hass, parse_options, resp.body, resp.charset, "gemeinde")
+
+async def _fetch_strasse_letter(hass, client, semaphore, run, gemeinde, letter):
+    """Fetch street options for streets starting with the given letter."""
+    data = {
+        "gemeinde": gemeinde,
+        "von": letter
+    }
+    async with semaphore:
+        resp = await run(lambda: client.async_request(data))
+    if resp.status != 200:
+        raise SystemError(f"Bad status {resp.status}")
+    return await async_parse(hass, parse_options, resp.body, resp.charset, "strasse") or {}
+
+async def fetch_form_options_strasse(hass, gemeinde, run=None):
+    """Fetch street options from the form page, all letters concurrently, each request sent through run."""
+    run = run or _async_direct
+    client = async_get_client(hass)
+    semaphore = asyncio.Semaphore(STRASSE_CONCURRENCY)
+    letters = [chr(c) for c in range(ord('A'), ord('Z')+1)]
+    pages = [None] * len(letters)
+
+    async def fetch(index, letter):
+        pages[index] = await _fetch_strasse_letter(hass, client, semaphore, run, gemeinde, letter)
+
+    try:
+        # The task group cancels all pending letters on the first failure
+        async with asyncio.TaskGroup() as group:
+            for index, letter in enumerate(letters):
+                group.create_task(fetch(index, letter))
+    except ExceptionGroup as err:
+        _LOGGER.error(f"Failed to fetch form page: {err.exceptions[0]}")
+        return None
+
+    strassen = {}
+    for page in pages:
+        strassen.update(page)
+    return strassen
+
+async def fetch_form_options_ladeort(hass, gemeinde, strasse, hausnr, hausnraddon):
+    """Fetch ladeort options from the form page."""
+    data = {
+        "gemeinde": gemeinde,
+        "strasse": strasse,
+        "hausnr": hausnr,
+        "hausnraddon": hausnraddon,
+    }
+    try:
+        resp = await async_get_client(hass).async_request(data)
+        if resp.status != 200:
+            return None
+    except Exception as err:
+        _LOGGER.error(f"Failed to fetch form page: {err}")
+        return None
+    return await async_parse(hass, parse_options, resp.body, resp.charset, "ladeort")
+
+class LadeortRequired(LookupError):
+    """The address needs a ladeort, carries the options parsed from the page."""
+
+    def __init__(self, ladeorte):
+        """Initialize error."""
+        super().__init__("Needs ladeort")
+        self.ladeorte = ladeorte
+
+async def validate_address(hass, data):
+    """Check an address against the schedule page.
+
+    Return True if pickups are listed, False if not, raise LadeortRequired in
+    case of a required ladeort and SystemError if the page cannot be fetched.
+    """
+    try:
+        resp = await async_get_client(hass).async_request(data)
+    except Exception as err:
+        raise SystemError(f"Fetch failed: {err}") from err
+    if resp.status != 200:
+        raise SystemError("Bad status")
+    text = resp.text()
+    has_data = any("<strong>"+abf+"</strong>" in text for abf in ABFALLARTEN)
+    needs_ladeort = 'id="ladeort" name="ladeort"' in text
+    if needs_ladeort and not has_data:
+        raise LadeortRequired(await async_parse(hass, parse_options, resp.body, resp.charset, "ladeort"))
+    return has_data
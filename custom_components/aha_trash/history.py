@@ -0,0 +1,170 @@
+"""Append-only archive of past pickups for AHA Trash Pickup."""
+import asyncio
+import logging
+import os
+from datetime import date as dt_date, timedelta
+
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, HISTORY_RETENTION, HISTORY_TAIL
+from .schedule import PickupDates
+
+_LOGGER = logging.getLogger(__name__)
+
+def _parse_line(line):
+    """Return (date, abfallart) of an archive line, None if it is invalid."""
+    day, _, abfallart = line.rstrip("\n").partition(";")
+    try:
+        day = dt_date.fromisoformat(day)
+    except ValueError:
+        return None
+    return (day, abfallart) if abfallart else None
+
+class PickupHistory:
+    """Every pickup of an entry that has passed, one ``date;abfallart`` line each.
+
+    The AHA page only lists recent and upcoming dates, the archive keeps the
+    older ones. Lines are only appended, the file is compacted when its
+    oldest line falls out of the retention period. The full archive is only
+    read on the first query, recording just looks at the end of the file.
+    """
+
+    def __init__(self, hass, entry_id):
+        """Initialize history."""
+        self.hass = hass
+        self.path = hass.config.path(STORAGE_DIR, f"{DOMAIN}.history.{entry_id}")
+        self._dates = None
+        # Latest archived date per trash type
+        self._latest = None
+        self._lock = asyncio.Lock()
+
+    def types(self):
+        """Return the archived trash types, empty until loaded."""
+        return list(self._dates or ())
+
+    def dates(self, abfallart):
+        """Return the archived dates of a trash type, empty until loaded."""
+        if self._dates is None:
+            return PickupDates(())
+        return self._dates.get(abfallart) or PickupDates(())
+
+    def _read(self, keep_after):
+        """Read the archive, compact it if needed, return sets of dates per trash type."""
+        dates = {}
+        compact = False
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    pickup = _parse_line(line)
+                    if pickup is None or pickup[0] < keep_after:
+                        compact = True
+                        continue
+                    day, abfallart = pickup
+                    days = dates.setdefault(abfallart, set())
+                    compact |= day in days
+                    days.add(day)
+        except FileNotFoundError:
+            return dates
+        if compact:
+            self._write(dates)
+        return dates
+
+    def _write(self, dates):
+        """Replace the archive with the given dates, oldest first."""
+        pickups = sorted((day, abfallart) for abfallart, days in dates.items() for day in days)
+        temp = f"{self.path}.tmp"
+        with open(temp, "w", encoding="utf-8") as file:
+            file.writelines(f"{day.isoformat()};{abfallart}\n" for day, abfallart in pickups)
+        os.replace(temp, self.path)
+
+    def _read_latest(self):
+        """Return the latest archived date per trash type from the end of the archive."""
+        latest = {}
+        try:
+            with open(self.path, "rb") as file:
+                size = file.seek(0, os.SEEK_END)
+                file.seek(max(size - HISTORY_TAIL, 0))
+                lines = file.read().decode("utf-8", errors="replace").split("\n")
+        except FileNotFoundError:
+            return latest
+        if size > HISTORY_TAIL:
+            # The first line may be cut
+            lines = lines[1:]
+        for line in lines:
+            pickup = _parse_line(line)
+            if pickup is not None and pickup[0] > latest.get(pickup[1], dt_date.min):
+                latest[pickup[1]] = pickup[0]
+        return latest
+
+    def _append(self, lines, keep_after):
+        """Append lines to the archive, compacting it first once its oldest line has expired."""
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                oldest = _parse_line(file.readline())
+        except FileNotFoundError:
+            oldest = None
+        if oldest is not None and oldest[0] < keep_after:
+            self._read(keep_after)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.writelines(lines)
+
+    async def async_load(self):
+        """Load the archive into memory once."""
+        if self._dates is not None:
+            return
+        async with self._lock:
+            if self._dates is not None:
+                return
+            keep_after = dt_util.now().date() - HISTORY_RETENTION
+            try:
+                dates = await self.hass.async_add_executor_job(self._read, keep_after)
+            except (OSError, UnicodeDecodeError) as err:
+                _LOGGER.warning(f"Discarding unreadable pickup history {self.path}: {err}")
+                dates = {}
+            self._dates = {abfallart: PickupDates(days) for abfallart, days in dates.items()}
+            self._latest = {abfallart: max(days) for abfallart, days in dates.items() if days}
+
+    async def async_record(self, data):
+        """Archive the passed pickups of coordinator data that are newer than the archived ones."""
+        today = dt_util.now().date()
+        keep_after = today - HISTORY_RETENTION
+        async with self._lock:
+            if self._latest is None:
+                try:
+                    self._latest = await self.hass.async_add_executor_job(self._read_latest)
+                except OSError as err:
+                    _LOGGER.warning(f"Failed to read pickup history {self.path}: {err}")
+                    return
+            lines = []
+            added = {}
+            for abfallart, item in data.items():
+                latest = self._latest.get(abfallart)
+                start = max(latest + timedelta(days=1), keep_after) if latest else keep_after
+                new = list(item["dates"].iter_between(start, today))
+                if new:
+                    added[abfallart] = new
+                    lines.extend(f"{day.isoformat()};{abfallart}\n" for day in new)
+            if lines:
+                try:
+                    await self.hass.async_add_executor_job(self._append, lines, keep_after)
+                except OSError as err:
+                    _LOGGER.warning(f"Failed to write pickup history {self.path}: {err}")
+                    return
+                for abfallart, new in added.items():
+                    self._latest[abfallart] = new[-1]
+            if self._dates is not None:
+                # Expired dates are dropped from memory as well
+                self._dates = {
+                    abfallart: PickupDates([*self.dates(abfallart).iter_between(keep_after), *added.get(abfallart, ())])
+                    for abfallart in self._dates.keys() | added.keys()
+                }
+
+    async def async_remove(self):
+        """Delete the archive."""
+        self._dates = None
+        self._latest = None
+        try:
+            await self.hass.async_add_executor_job(os.remove, self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,134 @@
+"""iCalendar export of the pickup schedules for AHA Trash Pickup."""
+import gzip
+import hashlib
+from datetime import timedelta
+from http import HTTPStatus
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, ICS_ALL
+
+def _escape(text):
+    """Escape a TEXT value."""
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def _fold(line):
+    """Fold a content line to at most 75 octets."""
+    raw = line.encode()
+    if len(raw) <= 75:
+        return line
+    parts = []
+    while len(raw) > 75:
+        cut = 75 if not parts else 74
+        # Do not split a multi-byte character
+        while raw[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(raw[:cut].decode())
+        raw = raw[cut:]
+    parts.append(raw.decode())
+    return "\r\n ".join(parts)
+
+def build_ics(coordinators, name):
+    """Return a VCALENDAR with an all-day event per pickup of the coordinators."""
+    stamp = dt_util.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    merged = len(coordinators) > 1
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:-//{DOMAIN}//{DOMAIN}//DE",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{_escape(name)}",
+    ]
+    for coordinator in coordinators:
+        entry = coordinator.entry
+        location = _escape(entry.title)
+        for abfallart, item in coordinator.data.items():
+            summary = _escape(f"{abfallart} ({entry.title})" if merged else abfallart)
+            slug = abfallart.lower().replace(" ", "_")
+            for d in item["dates"]:
+                lines += [
+                    "BEGIN:VEVENT",
+                    f"UID:{d:%Y%m%d}-{slug}-{entry.entry_id}@{DOMAIN}",
+                    f"DTSTAMP:{stamp}",
+                    f"DTSTART;VALUE=DATE:{d:%Y%m%d}",
+                    f"DTEND;VALUE=DATE:{d + timedelta(days=1):%Y%m%d}",
+                    f"SUMMARY:{summary}",
+                    f"LOCATION:{location}",
+                    "TRANSP:TRANSPARENT",
+                    "END:VEVENT",
+                ]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(_fold(line) for line in lines) + "\r\n"
+
+class IcsFeed:
+    """Rendered feed with its ETag and gzip body, valid as long as its key matches."""
+
+    __slots__ = ("key", "body", "gzip_body", "etag")
+
+    def __init__(self, key, text):
+        """Render the feed."""
+        self.key = key
+        self.body = text.encode()
+        self.gzip_body = gzip.compress(self.body, mtime=0)
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()}"'
+
+    def matches(self, key):
+        """Return True if the feed was rendered from the same schedules."""
+        return len(key) == len(self.key) and all(
+            a[:-1] == b[:-1] and a[-1] is b[-1] for a, b in zip(key, self.key)
+        )
+
+def _feed_key(coordinators):
+    """Return what a feed depends on, the schedules are compared by identity."""
+    return tuple(
+        (coordinator.entry.entry_id, coordinator.entry.title, abfallart, item["dates"])
+        for coordinator in coordinators
+        for abfallart, item in coordinator.data.items()
+    )
+
+class AHATrashIcsView(HomeAssistantView):
+    """Serve the pickups of one entry, or of all entries, as iCalendar feed.
+
+    The body is only rendered again when the schedules change, so polling
+    never triggers a fetch and unchanged feeds are answered with 304.
+    """
+
+    url = "/api/aha_trash/{entry_id}.ics"
+    name = "api:aha_trash:ics"
+
+    def __init__(self):
+        """Initialize view."""
+        self._feeds = {}
+
+    async def get(self, request, entry_id):
+        """Return the feed of an entry, or of all entries for entry_id all."""
+        hass = request.app["hass"]
+        loaded = hass.data.get(DOMAIN, {})
+        if entry_id == ICS_ALL:
+            coordinators = [c for c in loaded.values() if c.data]
+            name = "aha Abfuhrtermine"
+        elif entry_id in loaded and loaded[entry_id].data:
+            coordinators = [loaded[entry_id]]
+            name = loaded[entry_id].entry.title
+        else:
+            self._feeds.pop(entry_id, None)
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+
+        key = _feed_key(coordinators)
+        feed = self._feeds.get(entry_id)
+        if feed is None or not feed.matches(key):
+            feed = self._feeds[entry_id] = IcsFeed(key, build_ics(coordinators, name))
+
+        headers = {"ETag": feed.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("If-None-Match", "")
+        if if_none_match.strip() == "*" or feed.etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+            return web.Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            body = feed.gzip_body
+        else:
+            body = feed.body
+        return web.Response(body=body, headers=headers, content_type="text/calendar", charset="utf-8")
@@ -0,0 +1,70 @@
+"""Parsers for the AHA pages.
+
+The module level functions are pure and picklable, so they can run inline,
+in a thread or in a process pool.
+"""
+import re
+from functools import lru_cache
+
+from .const import ABFALLARTEN
+from .schedule import parse_date
+
+_SELECT = {
+    name: re.compile(r'<select[^>]+name="' + name + r'"[^>]*>(.*?)</select>', re.DOTALL)
+    for name in ("gemeinde", "strasse", "ladeort")
+}
+# Municipality options may be preselected, empty values are placeholders
+_OPTION_GEMEINDE = re.compile(r'<option\s+value="([^"]*)"\s*(?:selected="selected")?\s*>(.*?)</option>')
+_OPTION = re.compile(r'<option\s+value=["\'](.*?)["\']\s*>(.*?)</option>')
+
+@lru_cache(maxsize=8)
+def _schedule_pattern(abfallarten):
+    """Return the token pattern of the schedule page for the waste types."""
+    return re.compile(
+        r'<strong>(' + "|".join(re.escape(abfallart) for abfallart in abfallarten) + r')'
+        r'|colspan="3"'
+        r'|\w{2}, (\d{2}\.\d{2}\.\d{4})'
+    )
+
+def parse_schedule(body, encoding=None):
+    """Parse a whole schedule page, return the valid pickup dates per waste type.
+
+    Every waste type block starts with ``<strong>{abfallart}`` and ends at the
+    next ``colspan="3"``, the pickup dates in between look like ``Mo, 01.02.2025``.
+    """
+    text = body.decode(encoding or "utf-8", errors="replace")
+    termine = {}
+    current = None
+    for match in _schedule_pattern(tuple(ABFALLARTEN)).finditer(text):
+        abfallart, termin = match.group(1, 2)
+        if abfallart is not None:
+            # Only the first block of a waste type counts
+            current = abfallart if abfallart not in termine else None
+            if current is not None:
+                termine[current] = []
+        elif termin is not None:
+            if current is not None:
+                termine[current].append(termin)
+        else:
+            current = None
+            if len(termine) == len(ABFALLARTEN):
+                # All blocks seen, the rest of the page needs no parsing
+                break
+    result = {}
+    for abfallart, days in termine.items():
+        dates = [d for d in map(parse_date, days) if d is not None]
+        if dates:
+            result[abfallart] = dates
+    return result
+
+def parse_options(body, encoding, name):
+    """Return the value to label options of the select field name, None if it is missing."""
+    match = _SELECT[name].search(body.decode(encoding or "utf-8", errors="replace"))
+    if not match:
+        return None
+    options = {}
+    for option in (_OPTION_GEMEINDE if name == "gemeinde" else _OPTION).finditer(match.group(1)):
+        value = option.group(1).strip()
+        if value or name != "gemeinde":
+            options[value] = option.group(2).strip()
+    return options
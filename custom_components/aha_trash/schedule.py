@@ -0,0 +1,135 @@
+"""Pickup schedule data model for AHA Trash Pickup."""
+import heapq
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import islice, repeat
+from datetime import date as dt_date, timedelta
+
+def parse_date(date_str):
+    """Parse a date in the format used by the AHA page, return None if invalid."""
+    try:
+        day, month, year = map(int, date_str.split("."))
+        return dt_date(year, month, day)
+    except ValueError:
+        return None
+
+class PickupDates:
+    """Immutable, sorted pickup dates of a single waste type.
+
+    Dates are kept as day ordinals in an array, date objects are only created
+    when they are read.
+    """
+
+    __slots__ = ("_days",)
+
+    def __init__(self, dates):
+        """Initialize from any iterable of dates."""
+        self._days = array("i", sorted({d.toordinal() for d in dates}))
+
+    def __len__(self):
+        return len(self._days)
+
+    def __iter__(self):
+        return map(dt_date.fromordinal, self._days)
+
+    def __eq__(self, other):
+        if not isinstance(other, PickupDates):
+            return NotImplemented
+        return self._days == other._days
+
+    __hash__ = None
+
+    def next(self, day):
+        """Return the first pickup on or after day, None if there is none."""
+        index = bisect_left(self._days, day.toordinal())
+        if index == len(self._days):
+            return None
+        return dt_date.fromordinal(self._days[index])
+
+    def between(self, start, end):
+        """Return all pickups with start <= date < end."""
+        return tuple(self.iter_between(start, end))
+
+    def iter_between(self, start, end=None):
+        """Lazily iterate the pickups with start <= date < end, end None for all after start."""
+        days = self._days
+        stop = len(days) if end is None else bisect_left(days, end.toordinal())
+        return map(dt_date.fromordinal, islice(days, bisect_left(days, start.toordinal()), stop))
+
+def schedule_item(index, today):
+    """Return the coordinator data of a single waste type as seen on today."""
+    tomorrow = today + timedelta(days=1)
+    return {
+        "next_date": index.next(today),
+        "is_tomorrow": index.next(tomorrow) == tomorrow,
+        "dates": index,
+    }
+
+def next_boundary(item, today):
+    """Return the first day after today on which the item may change, None if never."""
+    next_date = item["next_date"]
+    if next_date is None:
+        return None
+    # The tomorrow flag turns on the day before and off on the pickup day,
+    # the next pickup moves on the day after
+    for day in (next_date - timedelta(days=1), next_date, next_date + timedelta(days=1)):
+        if day > today:
+            return day
+    return None
+
+def build_schedule(dates_by_type, today):
+    """Build the coordinator data from the pickup dates per waste type."""
+    result = {}
+    for abfallart, dates in dates_by_type.items():
+        index = PickupDates(dates)
+        if index:
+            # Keys are shared by all entries
+            result[sys.intern(abfallart)] = schedule_item(index, today)
+    return result
+
+def horizon(dates_by_type):
+    """Return the last known pickup over all waste types, None if there is none."""
+    return max((max(dates) for dates in dates_by_type.values() if dates), default=None)
+
+def merge_dates(existing, fetched, keep_after):
+    """Merge fetched dates into existing dates per waste type.
+
+    The fetched page replaces the existing dates within the range it covers,
+    dates outside of it are kept unless they are before keep_after.
+    """
+    covered = [d for dates in fetched.values() for d in dates]
+    if not covered:
+        return {abfallart: list(dates) for abfallart, dates in existing.items()}
+    first, last = min(covered), max(covered)
+    result = {}
+    for abfallart in existing.keys() | fetched.keys():
+        kept = [d for d in existing.get(abfallart, ()) if keep_after <= d and not first <= d <= last]
+        dates = kept + list(fetched.get(abfallart, ()))
+        if dates:
+            result[abfallart] = dates
+    return result
+
+def merge_pickups(sources, start, end=None, limit=None):
+    """Lazily merge the pickups of several schedules in date order.
+
+    sources are (key, PickupDates) pairs, yields (date, key) for start <= date < end,
+    at most limit pairs. Sources of the same key must be adjacent, a date found in
+    several of them is yielded once.
+    """
+    keys = []
+    streams = []
+    for index, (key, dates) in enumerate(sources):
+        keys.append(key)
+        # The index breaks ties between equal dates, keys are never compared
+        streams.append(zip(dates.iter_between(start, end), repeat(index)))
+    return islice(_unique(keys, heapq.merge(*streams)), limit)
+
+def _unique(keys, merged):
+    """Map merged (date, index) pairs to (date, key), skipping repeated pairs."""
+    previous = None
+    for d, index in merged:
+        pickup = (d, keys[index])
+        if pickup != previous:
+            yield pickup
+            previous = pickup
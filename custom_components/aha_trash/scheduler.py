@@ -0,0 +1,203 @@
+"""Domain-wide fetch scheduler for AHA Trash Pickup."""
+import asyncio
+import logging
+import random
+import weakref
+from datetime import timedelta
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later, async_track_point_in_time
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN, REFRESH_HOUR, RETRY_ATTEMPTS, RETRY_BACKOFF, RETRY_BACKOFF_MAX,
+    BREAKER_THRESHOLD, BREAKER_COOLDOWN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """Pause all fetches against the AHA site after consecutive failures.
+
+    While open, no requests are sent. After the cooldown a single probe
+    request is let through, its outcome closes or reopens the breaker.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        """Initialize breaker."""
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self._opened = None
+        self._probe = None
+
+    @staticmethod
+    def _now():
+        return asyncio.get_running_loop().time()
+
+    @property
+    def state(self):
+        """Return closed, open or half_open."""
+        if self._opened is None:
+            return "closed"
+        if self._probe is not None or self._now() - self._opened >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        """Return True if a request may be sent now."""
+        if self._opened is None:
+            return True
+        now = self._now()
+        if now - self._opened < self.cooldown:
+            return False
+        # A probe that never reported back must not block forever
+        if self._probe is not None and now - self._probe < self.cooldown:
+            return False
+        self._probe = now
+        return True
+
+    def record_success(self):
+        """Close the breaker after a successful request."""
+        if self._opened is not None:
+            _LOGGER.info("AHA site reachable again, resuming fetches")
+        self.failures = 0
+        self._opened = None
+        self._probe = None
+
+    def record_failure(self):
+        """Count a failed request, open the breaker at the threshold or on a failed probe."""
+        self.failures += 1
+        if self._probe is not None or (self._opened is None and self.failures >= self.threshold):
+            if self._opened is None:
+                _LOGGER.warning(f"Pausing fetches for {self.cooldown} seconds after {self.failures} failures")
+            self._opened = self._now()
+            self._probe = None
+
+    def as_dict(self):
+        """Return the breaker state for diagnostics."""
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+class AHAFetchScheduler:
+    """Spread coordinator refreshes over a daily window.
+
+    Every coordinator gets a stable offset inside the refresh window, so the
+    requests of many entries are not sent in the same second. Refreshes that
+    are due run through a bounded pool and a global requests-per-second cap.
+    """
+
+    def __init__(self, hass, concurrency, window, rate_limit):
+        """Initialize scheduler."""
+        self.hass = hass
+        self.window = window
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._interval = 1 / rate_limit if rate_limit else 0
+        self._rate_lock = asyncio.Lock()
+        self._next_slot = 0
+        self._pending = set()
+        self._retries = {}
+        # Coordinators of unloaded entries, a refresh still running must not retry them
+        self._unregistered = weakref.WeakSet()
+        self.breaker = CircuitBreaker()
+
+    def _offset(self, coordinator):
+        """Return the per-entry jitter inside the refresh window."""
+        seconds = self.window.total_seconds()
+        return timedelta(seconds=random.Random(coordinator.entry.entry_id).uniform(0, seconds))
+
+    def _next_refresh(self, coordinator):
+        """Return the next point in time the coordinator is due."""
+        now = dt_util.now()
+        next_update = now.replace(hour=REFRESH_HOUR, minute=0, second=0, microsecond=0) + self._offset(coordinator)
+        if next_update < now:
+            next_update += timedelta(days=1)
+        return next_update
+
+    @callback
+    def async_register(self, coordinator):
+        """Schedule daily refreshes for a coordinator, return a callback to unregister."""
+        unsub = None
+
+        @callback
+        def async_schedule():
+            nonlocal unsub
+            unsub = async_track_point_in_time(self.hass, async_due, self._next_refresh(coordinator))
+
+        @callback
+        def async_due(_):
+            async_schedule()
+            self._async_cancel_retry(coordinator)
+            coordinator.retries = 0
+            self.async_enqueue(coordinator)
+
+        @callback
+        def async_unregister():
+            if unsub is not None:
+                unsub()
+            self._unregistered.add(coordinator)
+            self._async_cancel_retry(coordinator)
+
+        async_schedule()
+        return async_unregister
+
+    @callback
+    def async_enqueue(self, coordinator):
+        """Queue a refresh of the coordinator unless one is already waiting."""
+        entry_id = coordinator.entry.entry_id
+        if entry_id in self._pending or coordinator in self._unregistered:
+            return
+        self._pending.add(entry_id)
+        self.hass.async_create_background_task(
+            self._async_refresh(coordinator), f"{DOMAIN} refresh {entry_id}"
+        )
+
+    async def _async_refresh(self, coordinator):
+        """Refresh a coordinator once a worker slot is free, retry with backoff on failure."""
+        try:
+            await self.async_run(coordinator.async_refresh)
+        finally:
+            self._pending.discard(coordinator.entry.entry_id)
+        if coordinator.last_update_success:
+            coordinator.retries = 0
+        elif coordinator.retries < RETRY_ATTEMPTS and coordinator not in self._unregistered:
+            self._async_schedule_retry(coordinator)
+
+    @callback
+    def _async_schedule_retry(self, coordinator):
+        """Schedule the next attempt with exponential backoff and jitter."""
+        delay = min(RETRY_BACKOFF * 2 ** coordinator.retries, RETRY_BACKOFF_MAX)
+        delay *= random.uniform(0.5, 1)
+        coordinator.retries += 1
+        entry_id = coordinator.entry.entry_id
+
+        @callback
+        def async_retry(_):
+            self._retries.pop(entry_id, None)
+            self.async_enqueue(coordinator)
+
+        self._async_cancel_retry(coordinator)
+        self._retries[entry_id] = async_call_later(self.hass, delay, async_retry)
+
+    @callback
+    def _async_cancel_retry(self, coordinator):
+        """Cancel a pending retry of the coordinator."""
+        if unsub := self._retries.pop(coordinator.entry.entry_id, None):
+            unsub()
+
+    async def async_run(self, target):
+        """Run a fetch coroutine function within the concurrency and rate limits."""
+        async with self._semaphore:
+            await self.async_throttle()
+            return await target()
+
+    async def async_throttle(self):
+        """Wait for the next free slot of the global rate limit, also for extra requests within a run."""
+        if not self._interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._rate_lock:
+            now = loop.time()
+            if self._next_slot > now:
+                await asyncio.sleep(self._next_slot - now)
+                now = self._next_slot
+            self._next_slot = now + self._interval
@@ -1,85 +1,76 @@
 """Sensor platform for AHA Trash Pickup – next pickup dates."""
-from datetime import date as dt_date
-
-from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
-from homeassistant.const import CONF_NAME
-from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
+from homeassistant.const import CONF_NAME, UnitOfTime
 from homeassistant.helpers.entity import EntityCategory
 
-from .const import DOMAIN, ABFALLARTEN, MANUFACTURER
+from .const import DOMAIN, ABFALLARTEN
+from .entity import AHATrashEntity, AHATrashTypeEntity
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the sensor platform."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
     entities = [
-        AHATrashDateSensor(coordinator, abfallart, entry.entry_id)
+        AHATrashDateSensor(coordinator, abfallart)
         for abfallart in ABFALLARTEN
     ]
+    entities.append(AHATrashFetchSensor(coordinator))
     async_add_entities(entities)
 
-class AHATrashDateSensor(SensorEntity):
+class AHATrashDateSensor(AHATrashTypeEntity, SensorEntity):
     """Sensor showing the next pickup date for a trash type."""
 
     _attr_device_class = SensorDeviceClass.DATE
     _attr_entity_category = EntityCategory.DIAGNOSTIC
 
-    def __init__(self, coordinator, abfallart, entry_id):
+    def __init__(self, coordinator, abfallart):
         """Initialize the sensor."""
-        self.coordinator = coordinator
-        self.abfallart = abfallart
-        self._attr_unique_id = f"{entry_id}_{abfallart.lower().replace(' ', '_')}_date"
+        super().__init__(coordinator, abfallart)
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_{abfallart.lower().replace(' ', '_')}_date"
         self._attr_name = f"{abfallart} nächste Abholung"
 
-    @property
-    def device_info(self):
-        """Return device info to group entities under the address device."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self.coordinator.entry.entry_id)},
-            name=self.coordinator.entry.title,
-            manufacturer=MANUFACTURER,
-            entry_type=DeviceEntryType.SERVICE,
-        )
-
     @property
     def native_value(self):
         """Return the next pickup date as date object."""
-        data = self.coordinator.data.get(self.abfallart, {})
-        next_date_str = data.get("next_date")
-        if not next_date_str:
-            return None
-        try:
-            day, month, year = map(int, next_date_str.split("."))
-            return dt_date(year, month, day)
-        except ValueError:
-            return None
+        return self.snapshot.next_date
 
     @property
     def icon(self):
         """Dynamic icon"""
-        is_tomorrow = self.coordinator.data.get(self.abfallart, {}).get("is_tomorrow", False)
-        if is_tomorrow:
-            icons = {
-                "Restabfall": "mdi:trash-can",
-                "Bioabfall": "mdi:food-apple",
-                "Papier": "mdi:file-document",
-                "Leichtverpackungen": "mdi:recycle",
-            }
-        else:
-            icons = {
-                "Restabfall": "mdi:trash-can-outline",
-                "Bioabfall": "mdi:food-apple-outline",
-                "Papier": "mdi:file-document-outline",
-                "Leichtverpackungen": "mdi:recycle-variant",
-            }
-        return icons.get(self.abfallart, "mdi:delete")
+        return self.snapshot.icon
+
+class AHATrashFetchSensor(AHATrashEntity, SensorEntity):
+    """Diagnostic sensor showing the duration of the last refresh."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator):
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{coordinator.entry.entry_id}_fetch_duration"
+        self._attr_name = "Abrufdauer"
+
+    @property
+    def native_value(self):
+        """Return the wall time of the last refresh in milliseconds."""
+        record = self.coordinator.stats.last
+        if record is None:
+            return None
+        return round(record.total * 1000)
 
     @property
-    def available(self):
-        """Return if entity is available."""
-        return self.coordinator.last_update_success and self.abfallart in self.coordinator.data
+    def extra_state_attributes(self):
+        """Return the breakdown of the last refresh."""
+        record = self.coordinator.stats.last
+        if record is None:
+            return None
+        return record.as_dict()
 
     async def async_added_to_hass(self):
-        """Connect to coordinator."""
+        """Connect to the refresh statistics."""
         self.async_on_remove(
-            self.coordinator.async_add_listener(self.async_write_ha_state)
+            self.coordinator.stats.async_add_listener(self.async_write_ha_state)
         )
@@ -0,0 +1,211 @@
+"""Services of the AHA Trash Pickup integration."""
+import asyncio
+import csv
+import io
+import logging
+from datetime import timedelta
+
+import voluptuous as vol
+
+from homeassistant.config_entries import SOURCE_IMPORT
+from homeassistant.core import SupportsResponse, callback
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .address_index import async_get_address_index
+from .const import (
+    DOMAIN, CONF_GEMEINDE, CONF_STRASSE, CONF_HAUSNR, CONF_HAUSNRADDON, CONF_LADEORT, DATA_SCHEDULER, ABFALLARTEN,
+    SERVICE_IMPORT_ADDRESSES, ATTR_ADDRESSES, ATTR_CSV, ATTR_DRY_RUN,
+    SERVICE_GET_SCHEDULE, ATTR_ENTRY_ID, ATTR_ABFALLART, ATTR_START, ATTR_END, ATTR_DAYS, ATTR_LIMIT,
+)
+from .form_options import LadeortRequired, validate_address
+from .schedule import merge_pickups
+
+_LOGGER = logging.getLogger(__name__)
+
+ADDRESS_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_GEMEINDE): cv.string,
+        vol.Required(CONF_STRASSE): cv.string,
+        vol.Required(CONF_HAUSNR): vol.Coerce(int),
+        vol.Optional(CONF_HAUSNRADDON, default=""): vol.Any(None, cv.string),
+        vol.Optional(CONF_LADEORT): vol.Any(None, cv.string),
+    }
+)
+IMPORT_ADDRESSES_SCHEMA = vol.Schema(
+    {
+        vol.Exclusive(ATTR_ADDRESSES, "source"): [dict],
+        vol.Exclusive(ATTR_CSV, "source"): cv.string,
+        vol.Optional(ATTR_DRY_RUN, default=False): cv.boolean,
+    }
+)
+
+GET_SCHEDULE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTRY_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_ABFALLART): vol.All(cv.ensure_list, [vol.In(ABFALLARTEN)]),
+        vol.Optional(ATTR_START): cv.date,
+        vol.Exclusive(ATTR_END, "window"): cv.date,
+        vol.Exclusive(ATTR_DAYS, "window"): cv.positive_int,
+        vol.Optional(ATTR_LIMIT): cv.positive_int,
+    }
+)
+
+class _Semicolon(csv.excel):
+    """CSV dialect used if the delimiter cannot be detected."""
+
+    delimiter = ";"
+
+def parse_csv(text):
+    """Return the rows of an address CSV with header, delimiter is detected."""
+    text = text.strip()
+    try:
+        dialect = csv.Sniffer().sniff(text.partition("\n")[0], delimiters=";,\t")
+    except csv.Error:
+        dialect = _Semicolon
+    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+    return [
+        {key.strip().lower(): value.strip() for key, value in row.items() if key and value}
+        for row in reader
+    ]
+
+def _resolve(index, query):
+    """Resolve a value, label or label prefix against an option index."""
+    if index is None:
+        return {}
+    return index.resolve(query)
+
+async def _async_import_address(hass, row, dry_run):
+    """Resolve, validate and import one address, return its result row."""
+    result = {"input": row}
+    try:
+        address = ADDRESS_SCHEMA(row)
+    except vol.Invalid as err:
+        return result | {"status": "error", "error": str(err)}
+    address[CONF_HAUSNRADDON] = address[CONF_HAUSNRADDON] or ""
+
+    # Index loads of many municipalities must respect the fetch limits, too
+    scheduler = hass.data[DATA_SCHEDULER]
+    index = async_get_address_index(hass)
+    gemeinden = _resolve(await index.async_get_gemeinden(scheduler.async_run), address[CONF_GEMEINDE])
+    if len(gemeinden) != 1:
+        status = "ambiguous_gemeinde" if gemeinden else "unknown_gemeinde"
+        return result | {"status": status, "candidates": gemeinden}
+    gemeinde = next(iter(gemeinden))
+
+    strassen = _resolve(await index.async_get_strassen(gemeinde, scheduler.async_run), address[CONF_STRASSE])
+    if len(strassen) != 1:
+        status = "ambiguous_strasse" if strassen else "unknown_strasse"
+        return result | {"status": status, "candidates": strassen}
+    strasse, strasse_text = next(iter(strassen.items()))
+
+    data = {
+        "gemeinde": gemeinde,
+        "strasse": strasse,
+        "hausnr": address[CONF_HAUSNR],
+        "hausnraddon": address[CONF_HAUSNRADDON],
+        "ladeort": address.get(CONF_LADEORT),
+    }
+    result["address"] = data
+    try:
+        valid = await scheduler.async_run(lambda: validate_address(hass, data))
+    except SystemError as err:
+        return result | {"status": "cannot_connect", "error": str(err)}
+    except LadeortRequired as err:
+        return result | {"status": "needs_ladeort", "candidates": err.ladeorte or {}}
+    if not valid:
+        return result | {"status": "invalid_address"}
+    if dry_run:
+        return result | {"status": "valid"}
+
+    flow = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": SOURCE_IMPORT}, data=data | {"strasse_text": strasse_text}
+    )
+    if flow["type"] == FlowResultType.CREATE_ENTRY:
+        return result | {"status": "created", "entry_id": flow["result"].entry_id}
+    return result | {"status": flow.get("reason", "error")}
+
+async def _async_import_row(hass, row, dry_run):
+    """Import one address, turning unexpected errors into an error row."""
+    try:
+        return await _async_import_address(hass, row, dry_run)
+    except Exception as err:
+        _LOGGER.exception(f"Importing address {row} failed")
+        return {"input": row, "status": "error", "error": str(err)}
+
+async def async_import_addresses(hass, rows, dry_run=False):
+    """Import addresses concurrently, return a result per row and counts per status."""
+    results = await asyncio.gather(*(_async_import_row(hass, row, dry_run) for row in rows))
+    summary = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    return {"summary": summary, "results": results}
+
+async def async_get_schedule(hass, entry_ids=None, abfallarten=None, start=None, end=None, limit=None):
+    """Return the known and archived pickups of the loaded entries in date order, without fetching."""
+    coordinators = hass.data.get(DOMAIN, {})
+    if entry_ids is not None:
+        if unknown := [entry_id for entry_id in entry_ids if entry_id not in coordinators]:
+            raise ServiceValidationError(f"Unknown or not loaded entries: {', '.join(unknown)}")
+        coordinators = {entry_id: coordinators[entry_id] for entry_id in entry_ids}
+    await asyncio.gather(*(coordinator.history.async_load() for coordinator in coordinators.values()))
+    sources = [
+        ((coordinator, abfallart), dates)
+        for coordinator in coordinators.values()
+        for abfallart in coordinator.known_abfallarten()
+        if abfallarten is None or abfallart in abfallarten
+        for dates in coordinator.known_dates(abfallart)
+    ]
+    return [
+        {
+            "date": d.isoformat(),
+            "abfallart": abfallart,
+            "entry_id": coordinator.entry.entry_id,
+            "title": coordinator.entry.title,
+        }
+        for d, (coordinator, abfallart) in merge_pickups(sources, start or dt_util.now().date(), end, limit)
+    ]
+
+@callback
+def async_setup_services(hass):
+    """Register the services of the integration."""
+
+    async def handle_import_addresses(call):
+        if ATTR_CSV in call.data:
+            rows = parse_csv(call.data[ATTR_CSV])
+        else:
+            rows = call.data.get(ATTR_ADDRESSES, [])
+        _LOGGER.info(f"Importing {len(rows)} addresses")
+        return await async_import_addresses(hass, rows, call.data[ATTR_DRY_RUN])
+
+    async def handle_get_schedule(call):
+        start = call.data.get(ATTR_START, dt_util.now().date())
+        end = call.data.get(ATTR_END)
+        if ATTR_DAYS in call.data:
+            end = start + timedelta(days=call.data[ATTR_DAYS])
+        pickups = await async_get_schedule(
+            hass,
+            call.data.get(ATTR_ENTRY_ID),
+            call.data.get(ATTR_ABFALLART),
+            start,
+            end,
+            call.data.get(ATTR_LIMIT),
+        )
+        return {"count": len(pickups), "pickups": pickups}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_SCHEDULE,
+        handle_get_schedule,
+        schema=GET_SCHEDULE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_ADDRESSES,
+        handle_import_addresses,
+        schema=IMPORT_ADDRESSES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,162 @@
+"""Refresh performance statistics for AHA Trash Pickup."""
+import asyncio
+import statistics
+from collections import deque
+
+import aiohttp
+
+from homeassistant.core import callback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, STATS_HISTORY
+
+class RefreshRecord:
+    """Timings and outcome of a single refresh, durations in seconds."""
+
+    __slots__ = (
+        "started", "_start", "_headers", "_body", "_end", "connect", "ttfb", "download", "parse",
+        "size", "retries", "outcome",
+    )
+
+    def __init__(self):
+        """Start a new record."""
+        self.started = dt_util.utcnow()
+        self._start = asyncio.get_running_loop().time()
+        self._headers = None
+        self._body = None
+        self._end = None
+        self.connect = 0.0
+        self.ttfb = None
+        self.download = None
+        self.parse = 0.0
+        self.size = 0
+        self.retries = 0
+        self.outcome = None
+
+    @property
+    def total(self):
+        """Return the wall time of the refresh, None while it is running."""
+        if self.outcome is None:
+            return None
+        return self._end - self._start
+
+    def headers_received(self):
+        """Mark the response headers as received."""
+        self._headers = asyncio.get_running_loop().time()
+        self._body = None
+        self.ttfb = self._headers - self._start - self.connect
+
+    def body_received(self):
+        """Mark the response body as completely read."""
+        self._body = asyncio.get_running_loop().time()
+
+    def finish(self, outcome):
+        """Finish the record with outcome, one of success, unchanged or the error."""
+        self._end = asyncio.get_running_loop().time()
+        if self._headers is not None and self._body is not None:
+            self.download = self._body - self._headers
+        self.outcome = outcome
+
+    def as_dict(self):
+        """Return the record for diagnostics."""
+        return {
+            "started": self.started.isoformat(),
+            "total": _round(self.total),
+            "connect": _round(self.connect),
+            "ttfb": _round(self.ttfb),
+            "download": _round(self.download),
+            "parse": _round(self.parse),
+            "size": self.size,
+            "retries": self.retries,
+            "outcome": self.outcome,
+        }
+
+def _round(value):
+    """Round seconds to milliseconds for display."""
+    return None if value is None else round(value, 4)
+
+class FetchStats:
+    """Ring buffer of the last refreshes of a coordinator."""
+
+    def __init__(self, maxlen=STATS_HISTORY):
+        """Initialize stats."""
+        self.records = deque(maxlen=maxlen)
+        self._listeners = []
+
+    @property
+    def last(self):
+        """Return the most recent record, None before the first refresh."""
+        return self.records[-1] if self.records else None
+
+    @callback
+    def async_add_listener(self, update_callback):
+        """Listen for finished refreshes, return a callback to remove the listener."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener():
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_add_record(self, record):
+        """Store a finished record and notify listeners."""
+        self.records.append(record)
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def as_dict(self):
+        """Return the summary and the records for diagnostics."""
+        return {"summary": summarize(self.records), "records": [r.as_dict() for r in self.records]}
+
+def summarize(records):
+    """Return latency percentiles and outcome counts over records."""
+    records = [r for r in records if r.outcome is not None]
+    if not records:
+        return {"count": 0}
+    errors = sum(1 for r in records if r.outcome not in ("success", "unchanged"))
+    totals = sorted(r.total for r in records)
+    summary = {
+        "count": len(records),
+        "errors": errors,
+        "retries": sum(r.retries for r in records),
+        "mean_size": round(statistics.fmean(r.size for r in records)),
+        "total_min": _round(totals[0]),
+        "total_max": _round(totals[-1]),
+        "total_mean": _round(statistics.fmean(totals)),
+    }
+    if len(totals) > 1:
+        cuts = statistics.quantiles(totals, n=100, method="inclusive")
+        summary["total_p50"] = _round(cuts[49])
+        summary["total_p95"] = _round(cuts[94])
+    return summary
+
+@callback
+def async_domain_stats(hass):
+    """Return the aggregated refresh statistics of all entries."""
+    coordinators = hass.data.get(DOMAIN, {}).values()
+    records = [record for coordinator in coordinators for record in coordinator.stats.records]
+    return {"entries": len(coordinators), "summary": summarize(records)}
+
+def create_trace_config():
+    """Return a trace config filling the RefreshRecord passed as trace_request_ctx."""
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_connection_create_start(session, ctx, params):
+        ctx.connect_start = asyncio.get_running_loop().time()
+
+    async def on_connection_create_end(session, ctx, params):
+        record = ctx.trace_request_ctx
+        if isinstance(record, RefreshRecord):
+            record.connect = asyncio.get_running_loop().time() - ctx.connect_start
+
+    async def on_request_end(session, ctx, params):
+        record = ctx.trace_request_ctx
+        if isinstance(record, RefreshRecord):
+            record.headers_received()
+
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
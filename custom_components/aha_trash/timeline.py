@@ -0,0 +1,70 @@
+"""Local timeline advancing the pickup flags at day boundaries."""
+import heapq
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.util import dt as dt_util
+
+from .schedule import next_boundary, schedule_item
+
+class PickupTimeline:
+    """Advance next pickup and tomorrow flags without fetching.
+
+    Keeps the next local midnight at which each waste type changes in a heap
+    and arms a single timer for the earliest one.
+    """
+
+    def __init__(self, hass, coordinator):
+        """Initialize timeline."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._heap = []
+        self._unsub = None
+
+    @callback
+    def async_rebuild(self):
+        """Recompute the boundaries from the current coordinator data."""
+        today = dt_util.now().date()
+        self._heap = []
+        for abfallart, item in (self.coordinator.data or {}).items():
+            day = next_boundary(item, today)
+            if day is not None:
+                self._heap.append((day, abfallart))
+        heapq.heapify(self._heap)
+        self._async_schedule()
+
+    @callback
+    def async_stop(self):
+        """Cancel the pending timer."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _async_schedule(self):
+        """Arm the timer for the earliest boundary."""
+        self.async_stop()
+        if self._heap:
+            self._unsub = async_track_point_in_time(
+                self.hass, self._async_fire, dt_util.start_of_local_day(self._heap[0][0])
+            )
+
+    @callback
+    def _async_fire(self, _):
+        """Advance all waste types whose boundary has been reached."""
+        self._unsub = None
+        today = dt_util.now().date()
+        data = dict(self.coordinator.data)
+        changed = set()
+        while self._heap and self._heap[0][0] <= today:
+            _, abfallart = heapq.heappop(self._heap)
+            item = schedule_item(data[abfallart]["dates"], today)
+            if item != data[abfallart]:
+                data[abfallart] = item
+                changed.add(abfallart)
+            day = next_boundary(item, today)
+            if day is not None:
+                heapq.heappush(self._heap, (day, abfallart))
+        if changed:
+            self.coordinator.async_set_timeline_data(data, changed)
+        self._async_schedule()